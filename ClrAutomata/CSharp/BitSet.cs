@@ -0,0 +1,134 @@
+// Generated from BitSet.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+
+namespace Automata
+{
+    /// <summary>
+    /// A fixed-capacity set of small non-negative integers, stored as an array
+    /// of bits. Bit sets are compared and hashed by value.
+    /// </summary>
+    public class BitSet
+    {
+        /// <summary>
+        /// Creates an empty bit set that can store the integers in the range
+        /// [0, Capacity).
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public BitSet(int Capacity)
+        {
+            this.words = new int[(Capacity + 31) / 32];
+        }
+
+        private int[] words;
+
+        /// <summary>
+        /// Finds out if this bit set is empty.
+        /// </summary>
+        public bool IsEmpty
+        {
+            [System.Diagnostics.Contracts.Pure] get
+            {
+                for (int i = 0; i < words.Length; i++)
+                {
+                    if (words[i] != 0)
+                        return false;
+                }
+                return true;
+            }
+        }
+
+        /// <summary>
+        /// Finds out if the given integer is in this bit set.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool Contains(int Value)
+        {
+            return (words[Value >> 5] & (1 << (Value & 31))) != 0;
+        }
+
+        /// <summary>
+        /// Adds the given integer to this bit set.
+        /// </summary>
+        public void Add(int Value)
+        {
+            words[Value >> 5] = words[Value >> 5] | (1 << (Value & 31));
+        }
+
+        /// <summary>
+        /// Adds all integers in the given bit set, which must have the same
+        /// capacity as this bit set, to this bit set.
+        /// </summary>
+        public void UnionWith(BitSet Other)
+        {
+            for (int i = 0; i < words.Length; i++)
+            {
+                words[i] = words[i] | Other.words[i];
+            }
+        }
+
+        /// <summary>
+        /// Finds out if this bit set and the given bit set have at least one
+        /// integer in common.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool Intersects(BitSet Other)
+        {
+            for (int i = 0; i < words.Length; i++)
+            {
+                if ((words[i] & Other.words[i]) != 0)
+                    return true;
+            }
+            return false;
+        }
+
+        /// <summary>
+        /// Creates a list of all integers in this bit set, in ascending order.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public List<int> ToList()
+        {
+            var results = new List<int>();
+            for (int i = 0; i < words.Length; i++)
+            {
+                int word = words[i];
+                if (word == 0)
+                    continue;
+
+                for (int j = 0; j < 32; j++)
+                {
+                    if ((word & (1 << j)) != 0)
+                        results.Add(i * 32 + j);
+                }
+            }
+            return results;
+        }
+
+        [System.Diagnostics.Contracts.Pure] public override int GetHashCode()
+        {
+            int result = 17;
+            for (int i = 0; i < words.Length; i++)
+            {
+                result = result * 31 + words[i];
+            }
+            return result;
+        }
+
+        [System.Diagnostics.Contracts.Pure] public override bool Equals(object Other)
+        {
+            if (Other is BitSet)
+            {
+                var otherWords = ((BitSet)Other).words;
+                if (otherWords.Length != words.Length)
+                    return false;
+
+                for (int i = 0; i < words.Length; i++)
+                {
+                    if (words[i] != otherWords[i])
+                        return false;
+                }
+                return true;
+            }
+            else
+            {
+                return false;
+            }
+        }
+    }
+}
@@ -0,0 +1,87 @@
+// Generated from ConcatRegex.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+
+namespace Automata
+{
+    /// <summary>
+    /// A regular expression that represents the concatenation of two other regular
+    /// expressions.
+    /// </summary>
+    public struct ConcatRegex : IRegex
+    {
+        /// <summary>
+        /// Creates a new concat regex for the given operands.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ConcatRegex(IRegex Left, IRegex Right)
+        {
+            this.Left = Left;
+            this.Right = Right;
+        }
+
+        /// <summary>
+        /// Gets the concat regex's left operand.
+        /// </summary>
+        public IRegex Left { [System.Diagnostics.Contracts.Pure] get; private set; }
+        /// <summary>
+        /// Gets the concat regex's right operand.
+        /// </summary>
+        public IRegex Right { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        [System.Diagnostics.Contracts.Pure] public override string ToString()
+        {
+            string result = "";
+            if (Left is UnionRegex)
+            {
+                result = "(" + Left.ToString() + ")";
+            }
+            else result = Left.ToString();
+            if (Right is UnionRegex)
+            {
+                result = result + "(" + Right.ToString() + ")";
+            }
+            else result = result + Right.ToString();
+            return result;
+        }
+
+        /// <summary>
+        /// Creates an epsilon-nfa for this concatenation regex.
+        /// The construction is as follows:
+        ///   * Automata are constructed for the left and right operands of this concat operation.
+        ///   * These automata are "merged":
+        ///     * The start state of the resulting automaton is the start state
+        ///       of the left operand's automaton.
+        ///     * The accepting states of the resulting automaton is the set of accepting
+        ///       states of the right operand's automaton.
+        ///   * For each accepting state in the left automaton, an epsilon-transition
+        ///     is added to the resulting automaton that starts at said accepting
+        ///     state and points to the right automaton's intial state.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ENFAutomaton<RegexState, char> ToENFAutomaton()
+        {
+            // NOTE: default(Optional<char>) indicates an epsilon-transition.
+
+            var leftAutomaton = Left.ToENFAutomaton();
+            var rightAutomaton = Right.ToENFAutomaton();
+
+            var startState = new RegexState();
+
+            var transTable = leftAutomaton.TransitionFunction;
+            transTable.Add(rightAutomaton.TransitionFunction);
+
+            var leftStartStates = new StateSet<RegexState>(leftAutomaton.StartState);
+            transTable[startState, default(Optional<char>)] = leftStartStates;
+
+            var leftEndStates = leftAutomaton.AcceptingStates;
+            var rightStartStates = new StateSet<RegexState>(rightAutomaton.StartState);
+            foreach (var item in leftEndStates)
+            {
+                transTable[item, default(Optional<char>)] = rightStartStates;
+            }
+
+            var acceptingStates = rightAutomaton.AcceptingStates;
+
+            return new ENFAutomaton<RegexState, char>(startState, acceptingStates, transTable);
+        }
+    }
+}
@@ -0,0 +1,449 @@
+// Generated from DFAutomaton.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+
+namespace Automata
+{
+    /// <summary>
+    /// Defines a deterministic finite automaton.
+    /// </summary>
+    public struct DFAutomaton<TState, TChar> : IAutomaton<TChar>
+    {
+        /// <summary>
+        /// Creates a deterministic finite automaton based on the given start
+        /// state, set of accepting states, and transition function.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAutomaton(TState StartState, StateSet<TState> AcceptingStates, TransitionMap<TState, TChar, TState> TransitionFunction)
+        {
+            this.StartState = StartState;
+            this.AcceptingStates = AcceptingStates;
+            this.TransitionFunction = TransitionFunction;
+        }
+
+        /// <summary>
+        /// Gets this automaton's start state.
+        /// </summary>
+        public TState StartState { [System.Diagnostics.Contracts.Pure] get; private set; }
+        /// <summary>
+        /// Gets this automaton's set of accepting states.
+        /// </summary>
+        public StateSet<TState> AcceptingStates { [System.Diagnostics.Contracts.Pure] get; private set; }
+        /// <summary>
+        /// Gets this automaton's transition function.
+        /// </summary>
+        public TransitionMap<TState, TChar, TState> TransitionFunction { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Applies the automaton's transition function to the given state and
+        /// symbol.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public TState PerformTransition(TState State, TChar Character)
+        {
+            return TransitionFunction[State, Character];
+        }
+
+        /// <summary>
+        /// Applies the automaton's extended transition function to the given state and
+        /// string of symbols.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public TState PerformExtendedTransition(TState State, IEnumerable<TChar> Characters)
+        {
+            var result = State;
+            foreach (var item in Characters)
+            {
+                result = PerformTransition(result, item);
+            }
+            return result;
+        }
+
+        /// <summary>
+        /// Renames this automaton with the given state and character renamer.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAutomaton<TNState, TNChar> Rename<TNState, TNChar>(Func<TState, TNState> StateRenamer, Func<TChar, TNChar> CharRenamer)
+        {
+            TNState newStart = StateRenamer(StartState);
+            var newAccept = new StateSet<TNState>();
+            var oldAccept = AcceptingStates;
+            foreach (var item in oldAccept)
+            {
+                newAccept.Add(StateRenamer(item));
+            }
+            var currentTransFun = TransitionFunction;
+            var newTransMap = new TransitionMap<TNState, TNChar, TNState>();
+            foreach (var item in currentTransFun)
+            {
+                newTransMap[StateRenamer(item.Item1), CharRenamer(item.Item2)] = StateRenamer(item.Item3);
+            }
+            return new DFAutomaton<TNState, TNChar>(newStart, newAccept, newTransMap);
+        }
+
+        /// <summary>
+        /// Gets the set of all states in this automaton.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> GetStates()
+        {
+            var results = new StateSet<TState>();
+            var transfunc = TransitionFunction;
+            foreach (var item in transfunc)
+            {
+                results.Add(item.Item1);
+                results.Add(item.Item3);
+            }
+            return results;
+        }
+
+        /// <summary>
+        /// Gets this automaton's alphabet, as a set of characters.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TChar> GetAlphabet()
+        {
+            var results = new StateSet<TChar>();
+            var transfunc = TransitionFunction;
+            foreach (var item in transfunc)
+            {
+                results.Add(item.Item2);
+            }
+            return results;
+        }
+
+        /// <summary>
+        /// Finds out if the given state is an accepting state.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool IsAcceptingState(TState State)
+        {
+            return AcceptingStates.Contains(State);
+        }
+
+        /// <summary>
+        /// Checks if this automaton accepts the given string of symbols.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool Accepts(IEnumerable<TChar> Characters)
+        {
+            return IsAcceptingState(PerformExtendedTransition(StartState, Characters));
+        }
+
+        /// <summary>
+        /// Performs the table-filling algorithm on this automaton, and
+        /// returns the resulting partition of equivalent states. This takes
+        /// time that is (at least) quadratic in the number of states, so
+        /// 'HopcroftPartition' should be preferred. The table-filling algorithm
+        /// is kept around as a reference implementation.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public Dictionary<TState, StateSet<TState>> TFAPartition()
+        {
+            var states = GetStates();
+            var symbols = GetAlphabet();
+            var accepting = AcceptingStates;
+
+            var statePairs = new StateSet<KeyValuePair<TState, TState>>();
+            foreach (var a in states)
+            foreach (var b in states)
+                statePairs.Add(new KeyValuePair<TState, TState>(a, b));
+
+            var distinguishablePairs = new HashSet<KeyValuePair<TState, TState>>();
+            foreach (var a in states)
+            {
+                if (!accepting.Contains(a))
+                {
+                    foreach (var b in accepting)
+                    {
+                        distinguishablePairs.Add(new KeyValuePair<TState, TState>(a, b));
+                        distinguishablePairs.Add(new KeyValuePair<TState, TState>(b, a));
+                    }
+                }
+            }
+
+            var unexaminedPairs = new StateSet<KeyValuePair<TState, TState>>(distinguishablePairs);
+            while (!unexaminedPairs.IsEmpty)
+            {
+                var ab = unexaminedPairs.Pop();
+                foreach (var sym in symbols)
+                {
+                    foreach (var pq in statePairs)
+                    {
+                        if (distinguishablePairs.Contains(pq))
+                            continue;
+
+                        if (EqualityComparer<TState>.Default.Equals(PerformTransition(pq.Key, sym), ab.Key)
+                            && EqualityComparer<TState>.Default.Equals(PerformTransition(pq.Value, sym), ab.Value))
+                        {
+                            distinguishablePairs.Add(pq);
+                            unexaminedPairs.Add(pq);
+                        }
+                    }
+                }
+            }
+
+            var partition = new Dictionary<TState, StateSet<TState>>();
+            foreach (var q in states)
+                partition[q] = new StateSet<TState>(q);
+
+            foreach (var ab in statePairs)
+            {
+                if (!distinguishablePairs.Contains(ab))
+                {
+                    var firstSet = partition[ab.Key];
+                    var secondSet = partition[ab.Value];
+                    firstSet.UnionWith(secondSet);  // <-- Evil mutable sets right here.
+                    partition[ab.Key] = firstSet;   // The first parition set is changed in-place.
+                                                    // ^ This is for readability only.
+                    partition[ab.Value] = firstSet; // Set second key to unified set
+                }
+            }
+
+            return partition;
+        }
+
+        /// <summary>
+        /// Performs Hopcroft's partition refinement algorithm on this
+        /// automaton, and returns the resulting partition of equivalent states.
+        /// Unlike the table-filling algorithm, this runs in O(n * k * log(n))
+        /// time, where n is the number of states, and k is the size of the
+        /// alphabet.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public Dictionary<TState, StateSet<TState>> HopcroftPartition()
+        {
+            var states = GetStates();
+            var symbols = GetAlphabet();
+
+            // Number the states, so blocks can be stored as lists of indices.
+            var stateList = new List<TState>(states);
+            var stateIndices = new Dictionary<TState, int>();
+            for (int i = 0; i < stateList.Count; i++)
+                stateIndices[stateList[i]] = i;
+
+            // Build the inverse transition function: for every symbol, map
+            // each state to the list of states that transition to it.
+            var inverse = new List<Dictionary<int, List<int>>>();
+            foreach (var sym in symbols)
+            {
+                var predecessors = new Dictionary<int, List<int>>();
+                for (int i = 0; i < stateList.Count; i++)
+                {
+                    int target = stateIndices[PerformTransition(stateList[i], sym)];
+                    if (!predecessors.ContainsKey(target))
+                        predecessors[target] = new List<int>();
+                    predecessors[target].Add(i);
+                }
+                inverse.Add(predecessors);
+            }
+
+            // Start out with the accepting and non-accepting states.
+            var blocks = new List<List<int>>();
+            var blockOf = new int[stateList.Count];
+            var accepting = new List<int>();
+            var rejecting = new List<int>();
+            for (int i = 0; i < stateList.Count; i++)
+            {
+                if (IsAcceptingState(stateList[i]))
+                    accepting.Add(i);
+                else
+                    rejecting.Add(i);
+            }
+
+            var initialBlocks = new List<List<int>>();
+            initialBlocks.Add(accepting);
+            initialBlocks.Add(rejecting);
+
+            var worklist = new Stack<int>();
+            var inWorklist = new List<bool>();
+            foreach (var initialBlock in initialBlocks)
+            {
+                if (initialBlock.Count > 0)
+                {
+                    foreach (var q in initialBlock)
+                        blockOf[q] = blocks.Count;
+                    worklist.Push(blocks.Count);
+                    inWorklist.Add(true);
+                    blocks.Add(initialBlock);
+                }
+            }
+
+            while (worklist.Count > 0)
+            {
+                int splitterIndex = worklist.Pop();
+                inWorklist[splitterIndex] = false;
+                var splitter = new List<int>(blocks[splitterIndex]);
+
+                foreach (var predecessors in inverse)
+                {
+                    // Group the predecessors of the splitter by block.
+                    var hits = new Dictionary<int, List<int>>();
+                    foreach (var q in splitter)
+                    {
+                        if (!predecessors.ContainsKey(q))
+                            continue;
+
+                        foreach (var p in predecessors[q])
+                        {
+                            int b = blockOf[p];
+                            if (!hits.ContainsKey(b))
+                                hits[b] = new List<int>();
+                            hits[b].Add(p);
+                        }
+                    }
+
+                    foreach (var hit in hits)
+                    {
+                        int b = hit.Key;
+                        var moved = hit.Value;
+                        if (moved.Count == blocks[b].Count)
+                            continue;
+
+                        // Split block 'b' into the states that transition to
+                        // the splitter, and those that do not.
+                        int newIndex = blocks.Count;
+                        var movedSet = new HashSet<int>(moved);
+                        var remaining = new List<int>();
+                        foreach (var q in blocks[b])
+                        {
+                            if (!movedSet.Contains(q))
+                                remaining.Add(q);
+                        }
+                        foreach (var q in moved)
+                            blockOf[q] = newIndex;
+                        blocks[b] = remaining;
+                        blocks.Add(moved);
+                        inWorklist.Add(false);
+
+                        // If 'b' is still waiting to be used as a splitter, then
+                        // both halves have to be used. Otherwise, using the
+                        // smaller half suffices.
+                        if (inWorklist[b] || moved.Count <= remaining.Count)
+                        {
+                            worklist.Push(newIndex);
+                            inWorklist[newIndex] = true;
+                        }
+                        else
+                        {
+                            worklist.Push(b);
+                            inWorklist[b] = true;
+                        }
+                    }
+                }
+            }
+
+            var blockSets = new List<StateSet<TState>>();
+            foreach (var block in blocks)
+            {
+                var blockSet = new StateSet<TState>();
+                foreach (var q in block)
+                    blockSet.Add(stateList[q]);
+                blockSets.Add(blockSet);
+            }
+
+            var partition = new Dictionary<TState, StateSet<TState>>();
+            for (int i = 0; i < stateList.Count; i++)
+                partition[stateList[i]] = blockSets[blockOf[i]];
+
+            return partition;
+        }
+
+        /// <summary>
+        /// Gets the set of all reachable states in this automaton.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> ReachableStates()
+        {
+            var todo = new StateSet<TState>(StartState);
+            var reachable = new StateSet<TState>();
+            var alpha = GetAlphabet();
+            while (!todo.IsEmpty)
+            {
+                var q = todo.Pop();
+                reachable.Add(q);
+                foreach (var sym in alpha)
+                {
+                    var newState = PerformTransition(q, sym);
+                    if (!reachable.Contains(newState))
+                        todo.Add(newState);
+                }
+            }
+            return reachable;
+        }
+
+        /// <summary>
+        /// Optimizes this automaton. First, all reachable states are detected.
+        /// Then, Hopcroft's algorithm is applied to these reachable states, and
+        /// all equivalent states are merged. A new automaton is constructed
+        /// based on these merged states, and then returned.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAutomaton<StateSet<TState>, TChar> Optimize()
+        {
+            var reachable = ReachableStates();
+            var filteredTable = new TransitionMap<TState, TChar, TState>();
+            var oldTable = TransitionFunction;
+            foreach (var item in oldTable)
+            {
+                var sourceState = item.Item1;
+                if (reachable.Contains(sourceState))
+                    filteredTable[sourceState, item.Item2] = item.Item3;
+            }
+
+            var partition = HopcroftPartition();
+
+            var optimalTable = new TransitionMap<StateSet<TState>, TChar, StateSet<TState>>();
+
+            foreach (var item in filteredTable)
+            {
+                var sourceState = item.Item1;
+                var symbol = item.Item2;
+                var targetState = item.Item3;
+                optimalTable[partition[sourceState], symbol] = partition[targetState];
+            }
+
+            var final = new StateSet<StateSet<TState>>();
+            foreach (var q in AcceptingStates)
+                final.Add(partition[q]);
+
+            return new DFAutomaton<StateSet<TState>, TChar>(
+                partition[StartState], final, optimalTable);
+        }
+
+        /// <summary>
+        /// Helper function that creates a key-value pair that has the given
+        /// key, and a value of 'true'.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] private static KeyValuePair<TState, bool> TagTrue(TState State)
+        {
+            return new KeyValuePair<TState, bool>(State, true);
+        }
+
+        /// <summary>
+        /// Helper function that creates a key-value pair that has the given
+        /// key, and a value of 'false'.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] private static KeyValuePair<TState, bool> TagFalse(TState State)
+        {
+            return new KeyValuePair<TState, bool>(State, false);
+        }
+
+        /// <summary>
+        /// Helper function that returns the given value.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] private static TChar Id(TChar Value)
+        {
+            return Value;
+        }
+
+        /// <summary>
+        /// Checks if this automaton is equivalent to the given other automaton.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool EquivalentTo(DFAutomaton<TState, TChar> other)
+        {
+            var taggedThis  = Rename<KeyValuePair<TState, bool>, TChar>(TagFalse, Id);
+            var taggedOther = other.Rename<KeyValuePair<TState, bool>, TChar>(TagTrue, Id);
+
+            var mergedTable = taggedThis.TransitionFunction;
+            mergedTable.Add(taggedOther.TransitionFunction);
+
+            var mergedAcceptingStates = taggedThis.AcceptingStates;
+            mergedAcceptingStates.UnionWith(taggedOther.AcceptingStates);
+
+            var mergedAutomaton = new DFAutomaton<KeyValuePair<TState, bool>, TChar>(
+                taggedThis.StartState, mergedAcceptingStates, mergedTable);
+            var partition = mergedAutomaton.HopcroftPartition();
+
+            return partition[taggedThis.StartState] == partition[taggedOther.StartState];
+        }
+    }
+}
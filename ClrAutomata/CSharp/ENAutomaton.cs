@@ -0,0 +1,227 @@
+// Generated from ENAutomaton.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+
+namespace Automata
+{
+    /// <summary>
+    /// Defines a non-deterministic finite automaton with epsilon transitions.
+    /// </summary>
+    public struct ENFAutomaton<TState, TChar> : IAutomaton<TChar>
+    {
+        /// <summary>
+        /// Creates a non-deterministic finite automaton with epsilon transitions
+        /// from the given start state, accepting states and transition functions.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ENFAutomaton(TState StartState, StateSet<TState> AcceptingStates, TransitionMap<TState, Optional<TChar>, StateSet<TState>> TransitionFunction)
+        {
+            this.StartState = StartState;
+            this.AcceptingStates = AcceptingStates;
+            this.TransitionFunction = TransitionFunction;
+        }
+
+        /// <summary>
+        /// Gets the e-NFA's start state.
+        /// </summary>
+        public TState StartState { [System.Diagnostics.Contracts.Pure] get; private set; }
+        /// <summary>
+        /// Gets the e-NFA's set of accepting states.
+        /// </summary>
+        public StateSet<TState> AcceptingStates { [System.Diagnostics.Contracts.Pure] get; private set; }
+        /// <summary>
+        /// Gets the e-NFA's transition function.
+        /// </summary>
+        public TransitionMap<TState, Optional<TChar>, StateSet<TState>> TransitionFunction { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Creates a new e-NFA by renaming this e-NFA's states and symbols.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ENFAutomaton<TNState, TNChar> Rename<TNState, TNChar>(Func<TState, TNState> StateRenamer, Func<TChar, TNChar> CharRenamer)
+        {
+            TNState newStart = StateRenamer(StartState);
+            var newAccept = new StateSet<TNState>();
+            foreach (var val in AcceptingStates)
+            {
+                newAccept.Add(StateRenamer(val));
+            }
+            var newTransMap = new TransitionMap<TNState, Optional<TNChar>, StateSet<TNState>>();
+            foreach (var item in TransitionFunction)
+            {
+                var renamedOriginState = StateRenamer(item.Item1);
+                var renamedTargetStates = new StateSet<TNState>();
+                foreach (var state in item.Item3)
+                {
+                    renamedTargetStates.Add(StateRenamer(state));
+                }
+                var renamedSymbol = item.Item2.Convert<TNChar>(CharRenamer);
+                newTransMap[renamedOriginState, renamedSymbol] = renamedTargetStates;
+            }
+            return new ENFAutomaton<TNState, TNChar>(newStart, newAccept, newTransMap);
+        }
+
+        /// <summary>
+        /// Performs a state transition that starts at the given state,
+        /// and uses the given character (or epsilon, if none is given).
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> PerformTransition(TState State, Optional<TChar> Character)
+        {
+            if (TransitionFunction.Contains(State, Character))
+            {
+                return TransitionFunction[State, Character];
+            }
+            else
+            {
+                return new StateSet<TState>();
+            }
+        }
+        /// <summary>
+        /// Returns the set of all states reachable by performing a single transition
+        /// with the given character for each state in the given state set.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> PerformAllTransitions(IEnumerable<TState> States, Optional<TChar> Character)
+        {
+            var results = new StateSet<TState>();
+            foreach (var val in States)
+            {
+                results.UnionWith(PerformTransition(val, Character));
+            }
+            return results;
+        }
+
+        /// <summary>
+        /// Computes the epsilon-closure of the given state.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> Eclose(TState State)
+        {
+            var results = new StateSet<TState>();
+            var step = new StateSet<TState>();
+            step.Add(State);
+            while (step.Count != 0)
+            {
+                var first = step.Pop();
+                results.Add(first);
+
+                var trans = PerformTransition(first, default(Optional<TChar>));
+                foreach (var item in trans)
+                    if (!results.Contains(item))
+                {
+                    step.Add(item);
+                }
+            }
+            return results;
+        }
+
+        /// <summary>
+        /// Computes the epsilon-closure of the given set of states.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> Eclose(IEnumerable<TState> States)
+        {
+            var vals = new StateSet<TState>();
+            foreach (var item in States)
+            {
+                vals.UnionWith(Eclose(item));
+            }
+            return vals;
+        }
+
+        /// <summary>
+        /// Performs the extended transition that starts at the given state and
+        /// persues the labels that match the elements of the given sequence of
+        /// characters, also performing the epsilon-closure.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> PerformExtendedTransition(TState State, IEnumerable<TChar> Characters)
+        {
+            var states = Eclose(State);
+            foreach (var item in Characters)
+            {
+                var optItem = new Optional<TChar>(item);
+                states = Eclose(PerformAllTransitions(states, optItem));
+            }
+            return states;
+        }
+
+        /// <summary>
+        /// Finds out whether the given sequence of states has a non-empty
+        /// intersection with the set of accepting states.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool ContainsAcceptingState(IEnumerable<TState> States)
+        {
+            var intersection = Enumerable.Intersect<TState>(AcceptingStates, States);
+            return Enumerable.Any<TState>(intersection);
+        }
+
+        /// <summary>
+        /// Figures out whether this automaton accepts the given string of
+        /// symbols.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool Accepts(IEnumerable<TChar> Characters)
+        {
+            return ContainsAcceptingState(PerformExtendedTransition(StartState, Characters));
+        }
+
+        /// <summary>
+        /// Gets the set of all states in this automaton.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> GetStates()
+        {
+            var results = new StateSet<TState>();
+            var transfunc = TransitionFunction;
+            foreach (var item in transfunc)
+            {
+                results.Add(item.Item1);
+                results.UnionWith(item.Item3);
+            }
+            return results;
+        }
+
+        /// <summary>
+        /// Gets the automaton's alphabet.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TChar> GetAlphabet()
+        {
+            var results = new StateSet<TChar>();
+            var transfunc = TransitionFunction;
+            foreach (var item in transfunc)
+            {
+                if (item.Item2.HasValue)
+                    results.Add(item.Item2.Value);
+            }
+            return results;
+        }
+
+        /// <summary>
+        /// Performs the modified subset construction on this automaton.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAutomaton<StateSet<TState>, TChar> ToDFAutomaton()
+        {
+            var construction = ToSubsetConstruction();
+            return construction.Automaton.Rename<StateSet<TState>, TChar>(construction.GetStateSet, Id);
+        }
+
+        /// <summary>
+        /// Performs the modified subset construction on this automaton, and
+        /// returns a DFA whose states are integers.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAutomaton<int, TChar> ToIndexedDFAutomaton()
+        {
+            return ToSubsetConstruction().Automaton;
+        }
+
+        /// <summary>
+        /// Performs the modified subset construction on this automaton. The
+        /// result maps each of the DFA's integer states back to the set of
+        /// e-NFA states it represents.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public SubsetConstruction<TState, TChar> ToSubsetConstruction()
+        {
+            return new SubsetConstruction<TState, TChar>(StartState, AcceptingStates, TransitionFunction, GetAlphabet());
+        }
+
+        [System.Diagnostics.Contracts.Pure] private static TChar Id(TChar Value)
+        {
+            return Value;
+        }
+    }
+}
@@ -0,0 +1,16 @@
+// Generated from IAutomaton.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+namespace Automata
+{
+    /// <summary>
+    /// Defines common automaton functionality.
+    /// </summary>
+    public interface IAutomaton<TChar>
+    {
+        /// <summary>
+        /// Gets a boolean value that indicates whether the automaton accepts the given string.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] bool Accepts(IEnumerable<TChar> Characters);
+    }
+}
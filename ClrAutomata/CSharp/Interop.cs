@@ -0,0 +1,547 @@
+// Generated from Interop.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+
+namespace Automata
+{
+    /// <summary>
+    /// Represents a DFA "handle", which is a convenience object that makes
+    /// interacting with DFAs easier.
+    /// </summary>
+    public class DFAHandle
+    {
+        /// <summary>
+        /// The sentinel state that the dense transition table uses for dead
+        /// states, and for characters that are not in the alphabet.
+        /// </summary>
+        public const int DeadState = -1;
+
+        [System.Diagnostics.Contracts.Pure] public DFAHandle(DFAutomaton<int, char> Automaton)
+        {
+            this.Automaton = Automaton;
+            this.Alphabet = Automaton.GetAlphabet();
+            this.Tags = new Dictionary<int, int>();
+            this.DeadStates = FindDeadStates();
+            Freeze();
+        }
+
+        /// <summary>
+        /// Creates a handle to a tagged DFA, whose accepting states are
+        /// labelled with an integer tag.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAHandle(DFAutomaton<int, char> Automaton, Dictionary<int, int> Tags)
+        {
+            this.Automaton = Automaton;
+            this.Tags = Tags;
+            this.Alphabet = Automaton.GetAlphabet();
+            this.DeadStates = FindDeadStates();
+            Freeze();
+        }
+
+        public DFAutomaton<int, char> Automaton { [System.Diagnostics.Contracts.Pure] get; private set; }
+        public StateSet<char> Alphabet { [System.Diagnostics.Contracts.Pure] get; private set; }
+        public IEnumerable<int> States { [System.Diagnostics.Contracts.Pure] get { return Automaton.GetStates(); } }
+
+        /// <summary>
+        /// Gets a dictionary that maps tagged states to their tags.
+        /// </summary>
+        public Dictionary<int, int> Tags { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Gets the set of dead states: states from which no accepting state
+        /// can be reached.
+        /// </summary>
+        public StateSet<int> DeadStates { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Gets the number of rows in the dense transition table.
+        /// </summary>
+        public int StateCount { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Gets the number of character classes, i.e. the number of columns in
+        /// the dense transition table.
+        /// </summary>
+        public int ClassCount { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Gets the characters that make up the alphabet, indexed by their
+        /// character class.
+        /// </summary>
+        public char[] ClassCharacters { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Gets the dense transition table. The successor of state 'q' on
+        /// character class 'c' is stored at index 'q * ClassCount + c'.
+        /// </summary>
+        public int[] TransitionTable { [System.Diagnostics.Contracts.Pure] get { return transitions; } }
+
+        /// <summary>
+        /// Gets an array that tells if a state is an accepting state, indexed
+        /// by state.
+        /// </summary>
+        public bool[] AcceptingTable { [System.Diagnostics.Contracts.Pure] get { return accepting; } }
+
+        /// <summary>
+        /// Gets the tags of all states, indexed by state. States without a tag
+        /// are mapped to -1.
+        /// </summary>
+        public int[] StateTags { [System.Diagnostics.Contracts.Pure] get { return stateTags; } }
+
+        /// <summary>
+        /// The dense transition table: the successor of state 'q' on
+        /// character class 'c' is stored at index 'q * ClassCount + c'.
+        /// </summary>
+        private int[] transitions;
+
+        /// <summary>
+        /// Maps characters to their character class, or to -1 if they are not
+        /// in the alphabet.
+        /// </summary>
+        private int[] charClasses;
+
+        /// <summary>
+        /// Tells if a state is an accepting state, indexed by state.
+        /// </summary>
+        private bool[] accepting;
+
+        /// <summary>
+        /// The tags of all states, indexed by state.
+        /// </summary>
+        private int[] stateTags;
+
+        [System.Diagnostics.Contracts.Pure] public DFAState GetInitialState()
+        {
+            return new DFAState(this, Automaton.StartState, DeadStates.Contains(Automaton.StartState));
+        }
+
+        /// <summary>
+        /// Gets the given state's tag, or -1 if it does not have a tag.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public int GetTag(int State)
+        {
+            return stateTags[State];
+        }
+
+        /// <summary>
+        /// Tells if the given state is an accepting state.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool IsAcceptingState(int State)
+        {
+            return accepting[State];
+        }
+
+        /// <summary>
+        /// Tells if the given state is the dead state sentinel.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool IsDeadState(int State)
+        {
+            return State == DeadState;
+        }
+
+        /// <summary>
+        /// Performs a single transition on the dense transition table. The
+        /// dead state sentinel is returned if the resulting state is dead, or
+        /// if the given character is not in the alphabet.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public int Step(int State, char Character)
+        {
+            int c = (int)Character;
+            if (c >= charClasses.Length)
+                return DeadState;
+
+            int charClass = charClasses[c];
+            if (charClass < 0)
+                return DeadState;
+
+            return transitions[State * ClassCount + charClass];
+        }
+
+        /// <summary>
+        /// Finds the length of the longest prefix of the given text, starting
+        /// at the given index, that is accepted by this handle's DFA. The
+        /// entire scan runs on the managed side, and stops at the first dead
+        /// state. The (exclusive) end index of the prefix is returned, or -1 if
+        /// no non-empty prefix is accepted.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public int LongestMatch(string Text, int Start)
+        {
+            return LongestTaggedMatch(Text, Start).End;
+        }
+
+        /// <summary>
+        /// Finds the longest prefix of the given text, starting at the given
+        /// index, that is accepted by this handle's DFA, and returns its end
+        /// index together with the tag of the state it ends in.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAMatch LongestTaggedMatch(string Text, int Start)
+        {
+            var table = transitions;
+            var classes = charClasses;
+            int classCount = ClassCount;
+            int s = Automaton.StartState;
+            int end = -1;
+            int tag = -1;
+            for (int i = Start; i < Text.Length; i++)
+            {
+                int c = (int)Text[i];
+                if (c >= classes.Length || classes[c] < 0)
+                    break;
+
+                s = table[s * classCount + classes[c]];
+                if (s == DeadState)
+                    break;
+
+                if (accepting[s])
+                {
+                    end = i + 1;
+                    tag = stateTags[s];
+                }
+            }
+            return new DFAMatch(end, tag);
+        }
+
+        /// <summary>
+        /// Computes the set of states from which no accepting state can be
+        /// reached, by working backwards from the accepting states.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] private StateSet<int> FindDeadStates()
+        {
+            var predecessors = new Dictionary<int, List<int>>();
+            foreach (var item in Automaton.TransitionFunction)
+            {
+                if (!predecessors.ContainsKey(item.Item3))
+                    predecessors[item.Item3] = new List<int>();
+                predecessors[item.Item3].Add(item.Item1);
+            }
+
+            var live = new StateSet<int>();
+            var todo = new StateSet<int>(Automaton.AcceptingStates);
+            while (!todo.IsEmpty)
+            {
+                var q = todo.Pop();
+                live.Add(q);
+                if (predecessors.ContainsKey(q))
+                {
+                    foreach (var p in predecessors[q])
+                        if (!live.Contains(p))
+                    {
+                        todo.Add(p);
+                    }
+                }
+            }
+
+            var dead = new StateSet<int>();
+            foreach (var q in Automaton.GetStates())
+            {
+                if (!live.Contains(q))
+                    dead.Add(q);
+            }
+            return dead;
+        }
+
+        /// <summary>
+        /// Freezes this handle's DFA into a dense transition table and a
+        /// character-to-class map. States are assumed to be small non-negative
+        /// integers, as produced by 'Interop.Instance.IndexAutomaton'. Transitions to
+        /// dead states are replaced by the dead state sentinel.
+        /// </summary>
+        private void Freeze()
+        {
+            int maxChar = -1;
+            int classCount = 0;
+            var classIndices = new Dictionary<char, int>();
+            this.ClassCharacters = new char[Alphabet.Count];
+            foreach (var item in Alphabet)
+            {
+                classIndices[item] = classCount;
+                ClassCharacters[classCount] = item;
+                classCount++;
+                if ((int)item > maxChar)
+                    maxChar = (int)item;
+            }
+
+            int stateCount = Automaton.StartState + 1;
+            foreach (var q in Automaton.GetStates())
+            {
+                if (q + 1 > stateCount)
+                    stateCount = q + 1;
+            }
+
+            this.StateCount = stateCount;
+            this.ClassCount = classCount;
+
+            this.charClasses = new int[maxChar + 1];
+            for (int i = 0; i < charClasses.Length; i++)
+                charClasses[i] = -1;
+            foreach (var item in classIndices)
+                charClasses[(int)item.Key] = item.Value;
+
+            this.transitions = new int[stateCount * classCount];
+            for (int i = 0; i < transitions.Length; i++)
+                transitions[i] = DeadState;
+            foreach (var item in Automaton.TransitionFunction)
+            {
+                if (!DeadStates.Contains(item.Item1) && !DeadStates.Contains(item.Item3))
+                    transitions[item.Item1 * classCount + classIndices[item.Item2]] = item.Item3;
+            }
+
+            this.accepting = new bool[stateCount];
+            this.stateTags = new int[stateCount];
+            for (int i = 0; i < stateCount; i++)
+            {
+                accepting[i] = Automaton.IsAcceptingState(i);
+                stateTags[i] = -1;
+            }
+            foreach (var item in Tags)
+                stateTags[item.Key] = item.Value;
+        }
+
+        /// <summary>
+        /// Optimizes this handle's underlying DFA, and returns a handle to said
+        /// optimized DFA. Tags are not preserved by this operation.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAHandle Optimize()
+        {
+            return new DFAHandle(Interop.Instance.IndexAutomaton<StateSet<int>>(Automaton.Optimize()));
+        }
+    }
+
+    /// <summary>
+    /// Describes the result of a longest-match scan.
+    /// </summary>
+    public struct DFAMatch
+    {
+        [System.Diagnostics.Contracts.Pure] public DFAMatch(int End, int Tag)
+        {
+            this.End = End;
+            this.Tag = Tag;
+        }
+
+        /// <summary>
+        /// Gets the (exclusive) end index of the match, or -1 if nothing was
+        /// matched.
+        /// </summary>
+        public int End { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Gets the tag of the state in which the match ended, or -1 if that
+        /// state does not have a tag.
+        /// </summary>
+        public int Tag { [System.Diagnostics.Contracts.Pure] get; private set; }
+    }
+
+    /// <summary>
+    /// Represents a DFA in a specific, possibly invalid, state. Invalid states
+    /// are dead: they can never reach an accepting state.
+    /// </summary>
+    public struct DFAState
+    {
+        [System.Diagnostics.Contracts.Pure] public DFAState(DFAHandle Automaton, int state, bool isInvalid)
+        {
+            this.Automaton = Automaton;
+            this.state = state;
+            this.isInvalid = isInvalid;
+        }
+
+        public DFAHandle Automaton { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        [System.Diagnostics.Contracts.Pure] public bool Accepts()
+        {
+            return !isInvalid && Automaton.IsAcceptingState(state);
+        }
+
+        /// <summary>
+        /// Gets this state's tag, or -1 if it does not have a tag.
+        /// </summary>
+        public int Tag
+        {
+            [System.Diagnostics.Contracts.Pure] get
+            {
+                if (isInvalid)
+                    return -1;
+                else
+                    return Automaton.GetTag(state);
+            }
+        }
+
+        [System.Diagnostics.Contracts.Pure] public DFAState AddInput(string Data)
+        {
+            if (isInvalid)
+    		{
+    			return this;
+    		}
+
+    		int s = state;
+            var a = Automaton;
+            for (int i = 0; i < Data.Length; i++)
+    		{
+                s = a.Step(s, Data[i]);
+    			if (a.IsDeadState(s))
+    			{
+    				return new DFAState(a, s, true);
+    			}
+    		}
+    		return new DFAState(a, s, false);
+        }
+
+        private int state;
+        private bool isInvalid;
+    }
+
+    /// <summary>
+    /// A closure object that provides a renaming function.
+    /// This is equivalent to a lambda that captures the 'indices' dictionary.
+    /// </summary>
+    public class IndexAutomatonClosure<T>
+    {
+        [System.Diagnostics.Contracts.Pure] public IndexAutomatonClosure()
+        {
+            this.indices = new Dictionary<T, int>();
+        }
+
+        private Dictionary<T, int> indices;
+
+        [System.Diagnostics.Contracts.Pure] public int Index(T Value)
+        {
+            if (indices.ContainsKey(Value))
+                return indices[Value];
+            else
+            {
+                int i = indices.Count;
+                indices[Value] = i;
+                return i;
+            }
+        }
+    }
+
+    /// <summary>
+    /// The automata interop class.
+    /// </summary>
+    public sealed class Interop
+    {
+        private Interop() { }
+
+        private static Interop Interop_instance_value = new Interop();
+
+        public static Interop Instance { get { return Interop_instance_value; } }
+        [System.Diagnostics.Contracts.Pure] private T Id<T>(T Value)
+        {
+            return Value;
+        }
+
+        /// <summary>
+        /// Converts any automaton to an indexed automaton.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAutomaton<int, char> IndexAutomaton<T>(DFAutomaton<T, char> Automaton)
+        {
+            var closure = new IndexAutomatonClosure<T>();
+            return Automaton.Rename<int, char>(closure.Index, Id<char>);
+        }
+
+        /// <summary>
+        /// Compiles the given regex to an indexed DFA handle.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAHandle CompileRegex(string Regex)
+        {
+            var regex = RegexParser.Instance.ParseRegex(Regex);
+
+    		var enfa = regex.ToENFAutomaton();
+
+    		var dfa = enfa.ToIndexedDFAutomaton();
+
+    		return new DFAHandle(dfa);
+        }
+
+        /// <summary>
+        /// Re-creates a DFA handle from the contents of another handle's dense
+        /// tables, as exposed by 'ClassCharacters', 'TransitionTable',
+        /// 'AcceptingTable' and 'StateTags'. This allows handles to be cached
+        /// without recompiling their regexes.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAHandle LoadHandle(int StartState, char[] ClassCharacters,
+            int[] Transitions, bool[] Accepting, int[] Tags)
+        {
+            int stateCount = Accepting.Length;
+            int classCount = ClassCharacters.Length;
+
+            // Dead transitions were replaced by a sentinel when the tables were
+            // frozen. Redirect them to a fresh dead state, so the reconstructed
+            // DFA is total again.
+            int deadState = stateCount;
+
+            var transMap = new TransitionMap<int, char, int>();
+            var acceptingStates = new StateSet<int>();
+            var tags = new Dictionary<int, int>();
+            for (int q = 0; q < stateCount; q++)
+            {
+                for (int c = 0; c < classCount; c++)
+                {
+                    int target = Transitions[q * classCount + c];
+                    if (target == DFAHandle.DeadState)
+                        target = deadState;
+                    transMap[q, ClassCharacters[c]] = target;
+                }
+                if (Accepting[q])
+                    acceptingStates.Add(q);
+                if (Tags[q] >= 0)
+                    tags[q] = Tags[q];
+            }
+            for (int c = 0; c < classCount; c++)
+                transMap[deadState, ClassCharacters[c]] = deadState;
+
+            var dfa = new DFAutomaton<int, char>(StartState, acceptingStates, transMap);
+            return new DFAHandle(dfa, tags);
+        }
+
+        /// <summary>
+        /// Compiles the given regexes to a single tagged DFA handle, which
+        /// recognizes the union of their languages. Each accepting state is
+        /// tagged with the index of the first regex in the array that it
+        /// accepts, so earlier regexes take priority over later ones.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public DFAHandle CompileTaggedRegexes(string[] Regexes)
+        {
+            var startState = new RegexState();
+            var startTargets = new StateSet<RegexState>();
+            var acceptingStates = new StateSet<RegexState>();
+            var transTable = new TransitionMap<RegexState, Optional<char>, StateSet<RegexState>>();
+            var regexTags = new Dictionary<RegexState, int>();
+
+            for (int i = 0; i < Regexes.Length; i++)
+            {
+                var regexEnfa = RegexParser.Instance.ParseRegex(Regexes[i]).ToENFAutomaton();
+                transTable.Add(regexEnfa.TransitionFunction);
+                startTargets.Add(regexEnfa.StartState);
+                foreach (var item in regexEnfa.AcceptingStates)
+                {
+                    acceptingStates.Add(item);
+                    regexTags[item] = i;
+                }
+            }
+
+            // Connect the regexes' automata with epsilon-transitions, as in
+            // UnionRegex.
+            transTable.Add(startState, default(Optional<char>), startTargets);
+
+            var enfa = new ENFAutomaton<RegexState, char>(startState, acceptingStates, transTable);
+
+            var construction = enfa.ToSubsetConstruction();
+            var dfa = construction.Automaton;
+
+            var tags = new Dictionary<int, int>();
+            foreach (var q in dfa.AcceptingStates)
+            {
+                int tag = Regexes.Length;
+                foreach (var item in construction.GetStateSet(q))
+                {
+                    if (regexTags.ContainsKey(item) && regexTags[item] < tag)
+                        tag = regexTags[item];
+                }
+                tags[q] = tag;
+            }
+
+            return new DFAHandle(dfa, tags);
+        }
+    }
+}
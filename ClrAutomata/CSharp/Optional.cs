@@ -0,0 +1,74 @@
+// Generated from Optional.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+namespace Automata
+{
+    /// <summary>
+    /// Defines a strongly-typed "optional" or "maybe" type.
+    /// </summary>
+    public struct Optional<T>
+    {
+        /// <summary>
+        /// Creates a new optional instance from the given value.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public Optional(T Value)
+        {
+            this.Value = Value;
+            HasValue = true; 
+        }
+
+        /// <summary>
+        /// Gets a boolean value that indicates if this optional object has a value.
+        /// </summary>
+        public bool HasValue { [System.Diagnostics.Contracts.Pure] get; private set; }
+        /// <summary>
+        /// Gets the optional instance's value, if any.
+        /// </summary>
+        public T Value { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        /// <summary>
+        /// Converts this optional instance to another type using the given conversion
+        /// function.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public Optional<TNew> Convert<TNew>(Func<T, TNew> Function)
+        {
+            if (HasValue)
+            {
+                return new Optional<TNew>(Function(Value));
+            }
+            else
+            {
+                return default(Optional<TNew>);
+            }
+        }
+
+        /// <summary>
+        /// Finds out if this optional object equals the given other optional
+        /// object.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public bool Equals(Optional<T> Other)
+        {
+            if (HasValue)
+            {
+                return Other.HasValue && EqualityComparer<T>.Default.Equals(Value, Other.Value);
+            }
+            else return !Other.HasValue;
+        }
+
+        /// <summary>
+        /// Finds out if this optional object equals the given other optional
+        /// object, if the latter is indeed an optional instance.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public override bool Equals(object Other)
+        {
+            if (Other is Optional<T>)
+            {
+                return Equals((Optional<T>)Other);
+            }
+            else
+            {
+                return false;
+            }
+        }
+    }
+}
@@ -0,0 +1,140 @@
+// Generated from Regex.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+
+namespace Automata
+{
+    /// <summary>
+    /// Defines a regex state, which is used in conjunction with reference equality.
+    /// </summary>
+    public class RegexState
+    {
+        /// <summary>
+        /// Creates a unique regex state.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public RegexState()
+        {
+        }
+    }
+
+    /// <summary>
+    /// Defines a generic regular expression.
+    /// </summary>
+    public interface IRegex
+    {
+        /// <summary>
+        /// Constructs an epsilon-nfa for this regex.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] ENFAutomaton<RegexState, char> ToENFAutomaton();
+        /// <summary>
+        /// Gets this regex's string representation.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] string ToString();
+    }
+
+    /// <summary>
+    /// Defines a literal regex, which is a regex that matches a single symbol.
+    /// </summary>
+    public class LiteralRegex : IRegex
+    {
+        /// <summary>
+        /// Creates a literal regex for the given symbol.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public LiteralRegex(char Literal)
+        {
+            this.Literal = Literal;
+        }
+
+        /// <summary>
+        /// Gets the literal regex's literal or symbol.
+        /// </summary>
+        public char Literal { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        [System.Diagnostics.Contracts.Pure] public override string ToString()
+        {
+            return Literal.ToString();
+        }
+
+        /// <summary>
+        /// Constructs an epsilon-nfa for this regex.
+        /// The construction is as follows:
+        ///    start literal end.
+        /// where 'start' is the initial state, 'end' is an accepting state,
+        /// and 'literal' is this regex' literal.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ENFAutomaton<RegexState, char> ToENFAutomaton()
+        {
+            var startState = new RegexState();
+            var acceptingStates = new StateSet<RegexState>();
+            acceptingStates.Add(new RegexState());
+            var transitions = new TransitionMap<RegexState, Optional<char>, StateSet<RegexState>>();
+            transitions[startState, new Optional<char>(Literal)] = acceptingStates;
+            return new ENFAutomaton<RegexState, char>(startState, acceptingStates, transitions);
+        }
+    }
+
+    /// <summary>
+    /// Defines an epsilon regex, which matches the empty string.
+    /// </summary>
+    public sealed class EpsilonRegex : IRegex
+    {
+        private EpsilonRegex() { }
+
+        private static EpsilonRegex EpsilonRegex_instance_value = new EpsilonRegex();
+
+        public static EpsilonRegex Instance { get { return EpsilonRegex_instance_value; } }
+        [System.Diagnostics.Contracts.Pure] public override string ToString()
+        {
+            return "\\e";
+        }
+
+        /// <summary>
+        /// Constructs an epsilon-nfa for this regex.
+        /// The construction is as follows:
+        ///    start -> end.
+        /// where 'start' is the initial state, 'end' is an accepting state,
+        /// and '->' is an epsilon-transition.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ENFAutomaton<RegexState, char> ToENFAutomaton()
+        {
+            var startState = new RegexState();
+            var acceptingStates = new StateSet<RegexState>();
+            acceptingStates.Add(new RegexState());
+            var transitions = new TransitionMap<RegexState, Optional<char>, StateSet<RegexState>>();
+            transitions[startState, default(Optional<char>)] = acceptingStates;
+            return new ENFAutomaton<RegexState, char>(startState, acceptingStates, transitions);
+        }
+    }
+
+    /// <summary>
+    /// Defines a phi regex, which matches nothing.
+    /// </summary>
+    public sealed class PhiRegex : IRegex
+    {
+        private PhiRegex() { }
+
+        private static PhiRegex PhiRegex_instance_value = new PhiRegex();
+
+        public static PhiRegex Instance { get { return PhiRegex_instance_value; } }
+        [System.Diagnostics.Contracts.Pure] public override string ToString()
+        {
+            return "\\p";
+        }
+
+
+        /// <summary>
+        /// Constructs an epsilon-nfa for this regex.
+        /// The construction is as follows:
+        ///    start.
+        /// where 'start' is the initial state. There are no transitions, and no
+        /// accepting states.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ENFAutomaton<RegexState, char> ToENFAutomaton()
+        {
+            var startState = new RegexState();
+            var acceptingStates = new StateSet<RegexState>();
+            var transTable = new TransitionMap<RegexState, Optional<char>, StateSet<RegexState>>();
+            return new ENFAutomaton<RegexState, char>(startState, acceptingStates, transTable);
+        }
+    }
+}
@@ -0,0 +1,139 @@
+// Generated from RegexParser.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+
+namespace Automata
+{
+    /// <summary>
+    /// A sequential parser type for string "streams".
+    /// </summary>
+    public class StringParser
+    {
+        [System.Diagnostics.Contracts.Pure] public StringParser(string val, int index)
+        {
+            this.val = val;
+            this.index = index;
+        }
+
+        private string val;
+        private int index;
+
+        public bool IsEmpty
+        {
+            [System.Diagnostics.Contracts.Pure] get { return index >= val.Length; }
+        }
+
+        public char Read()
+        {
+            var result = val[index];
+            Advance(1);
+            return result;
+        }
+
+        public void Advance(int Offset)
+        {
+            index += Offset;
+        }
+    }
+
+    public sealed class RegexParser
+    {
+        private RegexParser() { }
+
+        private static RegexParser RegexParser_instance_value = new RegexParser();
+
+        public static RegexParser Instance { get { return RegexParser_instance_value; } }
+        private IRegex ParseSimpleRegex(StringParser Input, char val)
+        {
+        	if (val == '\\' && !Input.IsEmpty)
+        	{
+        		val = Input.Read();
+        		if (val == 'e')
+        		{
+        			return EpsilonRegex.Instance;
+        		}
+        		else if (val == 'p')
+        		{
+        			return PhiRegex.Instance;
+        		}
+        	}
+        	return new LiteralRegex(val);
+        }
+
+        private IRegex ParsePrimaryRegex(StringParser Input, char val)
+        {
+        	IRegex first;
+
+        	if (val == '(')
+        	{
+        		first = ParseRegex(Input); // RParen has been parsed, ParseRegex will take care of LParen
+        	}
+        	else
+        	{
+        		first = ParseSimpleRegex(Input, val);
+        	}
+
+        	if (Input.IsEmpty) { return first; } // We're done here
+            val = Input.Read();
+
+        	if (val == '*')
+        	{
+        		var closure = new ClosureRegex(first);
+        		if (Input.IsEmpty)
+                {
+                    return closure;
+                }
+        		else
+                {
+                    val = Input.Read();
+                    if (val == ')' || val == '+')
+            		{
+                        Input.Advance(-1);
+            			return closure;
+            		}
+                    return new ConcatRegex(closure, ParsePrimaryRegex(Input, val));
+                }
+        	}
+        	else if (val != ')' && val != '+')
+        	{
+        		var second = ParsePrimaryRegex(Input, val);
+        		return new ConcatRegex(first, second);
+        	}
+        	else // These don't belong to us.
+        	{
+        		Input.Advance(-1);
+        		return first;
+        	}
+        }
+
+        private IRegex ParseRegex(StringParser Input, char val)
+        {
+        	IRegex first = ParsePrimaryRegex(Input, val);
+
+        	if (Input.IsEmpty) { return first; } // Nec plus ultra
+            val = Input.Read();
+
+        	if (val == '+')
+        	{
+        		var second = ParseRegex(Input);
+        		return new UnionRegex(first, second);
+        	}
+        	else
+        	{
+        		return first;
+        	}
+        }
+
+        public IRegex ParseRegex(StringParser Input)
+        {
+        	return ParseRegex(Input, Input.Read());
+        }
+
+        public IRegex ParseRegex(string Input)
+        {
+            return ParseRegex(new StringParser(Input, 0));
+        }
+    }
+}
@@ -0,0 +1,109 @@
+// Generated from StateSet.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+
+namespace Automata
+{
+    public class StateSet<T> : IEnumerable<T>
+    {
+        [System.Diagnostics.Contracts.Pure] public StateSet()
+        {
+            this.Set = new HashSet<T>();
+            this.SetComparer = HashSet<T>.CreateSetComparer();
+        }
+        [System.Diagnostics.Contracts.Pure] public StateSet(T Value)
+        {
+            this.Set = new HashSet<T>();
+            this.SetComparer = HashSet<T>.CreateSetComparer();
+            Add(Value);
+        }
+        [System.Diagnostics.Contracts.Pure] public StateSet(IEnumerable<T> Values)
+        {
+            this.Set = new HashSet<T>(Values);
+            this.SetComparer = HashSet<T>.CreateSetComparer();
+        }
+
+        public HashSet<T> Set { [System.Diagnostics.Contracts.Pure] get; private set; }
+        public IEqualityComparer<HashSet<T>> SetComparer { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        public T First
+        {
+            get { return Enumerable.First<T>(Set); }
+        }
+
+        public T Pop()
+        {
+            var val = First;
+            Remove(val);
+            return val;
+        }
+
+        public int Count
+        {
+            [System.Diagnostics.Contracts.Pure] get { return Set.Count; }
+        }
+
+        public bool IsEmpty
+        {
+            [System.Diagnostics.Contracts.Pure] get { return Count == 0; }
+        }
+
+        [System.Diagnostics.Contracts.Pure] public bool Contains(T Value)
+        {
+            return Set.Contains(Value);
+        }
+
+        public void Add(T Value)
+        {
+            Set.Add(Value);
+        }
+        public void UnionWith(IEnumerable<T> Items)
+        {
+            Set.UnionWith(Items);
+        }
+
+        public bool Remove(T Value)
+        {
+            return Set.Remove(Value);
+        }
+
+        [System.Diagnostics.Contracts.Pure] public override int GetHashCode()
+        {
+            return SetComparer.GetHashCode(Set);
+        }
+
+        [System.Diagnostics.Contracts.Pure] public override bool Equals(object Other)
+        {
+            if (Other is StateSet<T>)
+            {
+                return SetComparer.Equals(Set, ((StateSet<T>)Other).Set);
+            }
+            else
+            {
+                return false;
+            }
+        }
+
+        [System.Diagnostics.Contracts.Pure] public IEnumerator<T> GetGenericEnumerator()
+        {
+            return Set.GetEnumerator();
+        }
+
+        IEnumerator<T> IEnumerable<T>.GetEnumerator()
+        {
+            return GetGenericEnumerator();
+        }
+
+        [System.Diagnostics.Contracts.Pure] public System.Collections.IEnumerator GetObjectEnumerator()
+        {
+            return GetGenericEnumerator();
+        }
+
+        System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator()
+        {
+            return GetObjectEnumerator();
+        }
+    }
+}
@@ -0,0 +1,196 @@
+// Generated from SubsetConstruction.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+
+namespace Automata
+{
+    /// <summary>
+    /// Performs the modified subset construction on an e-NFA. NFA states are
+    /// numbered, sets of NFA states are represented as interned bit sets, and
+    /// the epsilon-closure of every NFA state is computed at most once. The
+    /// resulting DFA's states are integers.
+    /// </summary>
+    public class SubsetConstruction<TState, TChar>
+    {
+        /// <summary>
+        /// Performs the subset construction on the e-NFA with the given start
+        /// state, accepting states and transition function, based on the
+        /// given alphabet.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public SubsetConstruction(TState StartState, StateSet<TState> AcceptingStates, TransitionMap<TState, Optional<TChar>, StateSet<TState>> TransitionFunction, StateSet<TChar> Alphabet)
+        {
+            // Number the NFA states and the symbols.
+            this.nfaStates = new List<TState>();
+            var stateIndices = new Dictionary<TState, int>();
+            IndexState(stateIndices, StartState);
+            foreach (var item in TransitionFunction)
+            {
+                IndexState(stateIndices, item.Item1);
+                foreach (var target in item.Item3)
+                    IndexState(stateIndices, target);
+            }
+            foreach (var item in AcceptingStates)
+                IndexState(stateIndices, item);
+
+            int stateCount = nfaStates.Count;
+
+            var symbols = new List<TChar>(Alphabet);
+            var symbolIndices = new Dictionary<TChar, int>();
+            for (int i = 0; i < symbols.Count; i++)
+                symbolIndices[symbols[i]] = i;
+
+            // Convert the transition function to lists of indices. Epsilon-
+            // transitions are stored separately.
+            this.epsilonMoves = new List<List<int>>();
+            this.symbolMoves = new List<Dictionary<int, List<int>>>();
+            this.closures = new List<BitSet>();
+            for (int i = 0; i < stateCount; i++)
+            {
+                epsilonMoves.Add(new List<int>());
+                symbolMoves.Add(new Dictionary<int, List<int>>());
+                closures.Add(null);
+            }
+            foreach (var item in TransitionFunction)
+            {
+                int source = stateIndices[item.Item1];
+                List<int> targets;
+                if (item.Item2.HasValue)
+                {
+                    if (!symbolIndices.ContainsKey(item.Item2.Value))
+                        continue;
+
+                    int symbol = symbolIndices[item.Item2.Value];
+                    if (!symbolMoves[source].ContainsKey(symbol))
+                        symbolMoves[source][symbol] = new List<int>();
+                    targets = symbolMoves[source][symbol];
+                }
+                else
+                {
+                    targets = epsilonMoves[source];
+                }
+                foreach (var target in item.Item3)
+                    targets.Add(stateIndices[target]);
+            }
+
+            var acceptingBits = new BitSet(stateCount);
+            foreach (var item in AcceptingStates)
+                acceptingBits.Add(stateIndices[item]);
+
+            // Explore the DFA's states, interning them as we go.
+            this.dfaStates = new List<BitSet>();
+            this.stateSets = new List<StateSet<TState>>();
+            var dfaIndices = new Dictionary<BitSet, int>();
+            var transMap = new TransitionMap<int, TChar, int>();
+            var accStates = new StateSet<int>();
+
+            int startState = Intern(dfaIndices, Eclose(stateIndices[StartState]));
+            for (int current = 0; current < dfaStates.Count; current++)
+            {
+                var members = dfaStates[current].ToList();
+
+                var successors = new List<BitSet>();
+                for (int i = 0; i < symbols.Count; i++)
+                    successors.Add(new BitSet(stateCount));
+
+                foreach (var q in members)
+                {
+                    foreach (var move in symbolMoves[q])
+                    {
+                        var successor = successors[move.Key];
+                        foreach (var target in move.Value)
+                            successor.UnionWith(Eclose(target));
+                    }
+                }
+
+                for (int i = 0; i < symbols.Count; i++)
+                    transMap[current, symbols[i]] = Intern(dfaIndices, successors[i]);
+
+                if (dfaStates[current].Intersects(acceptingBits))
+                    accStates.Add(current);
+            }
+
+            this.Automaton = new DFAutomaton<int, TChar>(startState, accStates, transMap);
+        }
+
+        /// <summary>
+        /// Gets the DFA that was produced by the subset construction.
+        /// </summary>
+        public DFAutomaton<int, TChar> Automaton { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        private List<TState> nfaStates;
+        private List<List<int>> epsilonMoves;
+        private List<Dictionary<int, List<int>>> symbolMoves;
+        private List<BitSet> closures;
+        private List<BitSet> dfaStates;
+        private List<StateSet<TState>> stateSets;
+
+        /// <summary>
+        /// Gets the set of NFA states that corresponds to the given DFA state.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public StateSet<TState> GetStateSet(int State)
+        {
+            if (stateSets[State] == null)
+            {
+                var result = new StateSet<TState>();
+                foreach (var q in dfaStates[State].ToList())
+                    result.Add(nfaStates[q]);
+                stateSets[State] = result;
+            }
+            return stateSets[State];
+        }
+
+        private void IndexState(Dictionary<TState, int> StateIndices, TState State)
+        {
+            if (!StateIndices.ContainsKey(State))
+            {
+                StateIndices[State] = nfaStates.Count;
+                nfaStates.Add(State);
+            }
+        }
+
+        /// <summary>
+        /// Gets the DFA state for the given set of NFA states, creating a new
+        /// DFA state if there is no such state yet.
+        /// </summary>
+        private int Intern(Dictionary<BitSet, int> DfaIndices, BitSet States)
+        {
+            if (DfaIndices.ContainsKey(States))
+                return DfaIndices[States];
+
+            int index = dfaStates.Count;
+            DfaIndices[States] = index;
+            dfaStates.Add(States);
+            stateSets.Add(null);
+            return index;
+        }
+
+        /// <summary>
+        /// Computes the epsilon-closure of the given NFA state. Closures are
+        /// memoized, so each closure is computed only once.
+        /// </summary>
+        private BitSet Eclose(int State)
+        {
+            if (closures[State] != null)
+                return closures[State];
+
+            var result = new BitSet(nfaStates.Count);
+            var step = new Stack<int>();
+            result.Add(State);
+            step.Push(State);
+            while (step.Count != 0)
+            {
+                var first = step.Pop();
+                foreach (var item in epsilonMoves[first])
+                {
+                    if (!result.Contains(item))
+                    {
+                        result.Add(item);
+                        step.Push(item);
+                    }
+                }
+            }
+            closures[State] = result;
+            return result;
+        }
+    }
+}
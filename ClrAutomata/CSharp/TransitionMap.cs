@@ -0,0 +1,71 @@
+// Generated from TransitionMap.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Text;
+
+namespace Automata
+{
+    public class TransitionMap<T1, T2, T3> : IEnumerable<Tuple<T1, T2, T3>>
+    {
+        [System.Diagnostics.Contracts.Pure] public TransitionMap()
+        {
+            this.transitions = new Dictionary<KeyValuePair<T1, T2>, T3>();
+        }
+
+        private Dictionary<KeyValuePair<T1, T2>, T3> transitions;
+
+        public T3 this[T1 State, T2 Symbol]
+        {
+            [System.Diagnostics.Contracts.Pure] get { return transitions[new KeyValuePair<T1, T2>(State, Symbol)]; }
+            set { transitions[new KeyValuePair<T1, T2>(State, Symbol)] = value; }
+        }
+
+        [System.Diagnostics.Contracts.Pure] public bool Contains(T1 State, T2 Symbol)
+        {
+            return transitions.ContainsKey(new KeyValuePair<T1, T2>(State, Symbol));
+        }
+
+        public void Add(T1 State, T2 Symbol, T3 Result)
+        {
+            transitions.Add(new KeyValuePair<T1, T2>(State, Symbol), Result);
+        }
+
+        public void Add(Tuple<T1, T2, T3> Item)
+        {
+            Add(Item.Item1, Item.Item2, Item.Item3);
+        }
+
+        public void Add(TransitionMap<T1, T2, T3> Map)
+        {
+            foreach (var item in Map)
+                Add(item);
+        }
+
+        [System.Diagnostics.Contracts.Pure] private static Tuple<T1, T2, T3> ToTuple(KeyValuePair<KeyValuePair<T1, T2>, T3> Pair)
+        {
+            return new Tuple<T1, T2, T3>(Pair.Key.Key, Pair.Key.Value, Pair.Value);
+        }
+
+        [System.Diagnostics.Contracts.Pure] public IEnumerator<Tuple<T1, T2, T3>> GetGenericEnumerator()
+        {
+            return Enumerable.Select<KeyValuePair<KeyValuePair<T1, T2>, T3>, Tuple<T1, T2, T3>>(
+                    transitions, ToTuple).GetEnumerator();
+        }
+
+        IEnumerator<Tuple<T1, T2, T3>> IEnumerable<Tuple<T1, T2, T3>>.GetEnumerator()
+        {
+            return GetGenericEnumerator();
+        }
+
+        [System.Diagnostics.Contracts.Pure] public System.Collections.IEnumerator GetObjectEnumerator()
+        {
+            return GetGenericEnumerator();
+        }
+
+        System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator()
+        {
+            return GetObjectEnumerator();
+        }
+    }
+}
@@ -0,0 +1,56 @@
+// Generated from UnionRegex.ds by ds2cs.py. Edit the D# source instead.
+using System;
+using System.Collections.Generic;
+
+namespace Automata
+{
+    /// <summary>
+    /// Defines a regex type that is the union of two other regex.
+    /// </summary>
+    public struct UnionRegex : IRegex
+    {
+        [System.Diagnostics.Contracts.Pure] public UnionRegex(IRegex Left, IRegex Right)
+        {
+            this.Left = Left;
+            this.Right = Right;
+        }
+
+        public IRegex Left { [System.Diagnostics.Contracts.Pure] get; private set; }
+        public IRegex Right { [System.Diagnostics.Contracts.Pure] get; private set; }
+
+        [System.Diagnostics.Contracts.Pure] public override string ToString()
+        {
+            return Left.ToString() + "+" + Right.ToString();
+        }
+
+        /// <summary>
+        /// Creates an epsilon-nfa for this union regex.
+        /// The construction is as follows:
+        ///   * Automata are constructed for the left and right operands of this union operation.
+        ///   * These automata are "merged":
+        ///     * A new start state is created, with epsilon-transitions going out
+        ///       to the left and right automata.
+        ///     * The accepting states of the resulting automaton is union of the
+        ///       accepting states of the left and right operands' automata.
+        /// </summary>
+        [System.Diagnostics.Contracts.Pure] public ENFAutomaton<RegexState, char> ToENFAutomaton()
+        {
+            var startState = new RegexState();
+
+            var leftAutomaton = Left.ToENFAutomaton();
+            var rightAutomaton = Right.ToENFAutomaton();
+
+            var transTable = leftAutomaton.TransitionFunction;
+            transTable.Add(rightAutomaton.TransitionFunction);
+
+            var redirectedStates = new StateSet<RegexState>(leftAutomaton.StartState);
+            redirectedStates.Add(rightAutomaton.StartState);
+            transTable.Add(startState, default(Optional<char>), redirectedStates);
+
+            var acceptingStates = leftAutomaton.AcceptingStates;
+            acceptingStates.UnionWith(rightAutomaton.AcceptingStates);
+
+            return new ENFAutomaton<RegexState, char>(startState, acceptingStates, transTable);
+        }
+    }
+}
@@ -0,0 +1,36 @@
+#!/bin/sh
+# Builds src/dfasm/Automata.dll and src/dfasm/Automata.xml from the D# sources
+# in ClrAutomata, on machines that do not have dsc.
+#
+# ds2cs.py translates the D# sources to the C# files in this directory, which
+# are then compiled with Roslyn. The library is compiled against the
+# reference-only declarations of the .NET Framework 4 assemblies in refs/, so
+# no .NET Framework installation is needed, and the build is deterministic.
+#
+# Set CSC to the command that runs Roslyn's csc (the default is "csc"), and
+# PYTHON to a Python interpreter (the default is "python").
+set -e
+
+CSC=${CSC:-csc}
+PYTHON=${PYTHON:-python}
+
+here=$(cd "$(dirname "$0")" && pwd)
+dfasm=$(cd "$here/../../src/dfasm" && pwd)
+obj=$(mktemp -d)
+trap 'rm -rf "$obj"' EXIT
+
+"$PYTHON" "$here/ds2cs.py" "$here/.." "$here" "$dfasm/Automata.xml"
+
+cd "$here/refs"
+$CSC -nologo -noconfig -nostdlib -deterministic -runtimemetadataversion:v4.0.30319 \
+    -target:library -publicsign -keyfile:ecma.snk -nowarn:0659,0660,0661,0114 \
+    -out:"$obj/mscorlib.dll" mscorlib.cs
+$CSC -nologo -noconfig -nostdlib -deterministic -target:library -publicsign -keyfile:ecma.snk \
+    -r:"$obj/mscorlib.dll" -out:"$obj/System.dll" System.cs
+$CSC -nologo -noconfig -nostdlib -deterministic -target:library -publicsign -keyfile:ecma.snk \
+    -r:"$obj/mscorlib.dll" -out:"$obj/System.Core.dll" System.Core.cs
+
+cd "$here"
+$CSC -nologo -noconfig -nostdlib -optimize+ -deterministic -langversion:7.3 -target:library \
+    -platform:anycpu -nowarn:0659 -r:"$obj/mscorlib.dll" -r:"$obj/System.dll" \
+    -r:"$obj/System.Core.dll" -out:"$dfasm/Automata.dll" *.cs
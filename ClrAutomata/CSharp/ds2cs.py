@@ -0,0 +1,331 @@
+""" Translates the D# sources of the Automata library to C#, for machines that
+do not have dsc, and writes the library's XML documentation in the format
+that dsc's `docs=xml` option produces.
+
+Usage: ds2cs.py <D# source directory> <C# output directory> <XML output file>
+
+The translation is mechanical, and only covers the D# constructs that the
+Automata sources use. The files in the source directory's Automata.dsproj
+are translated in order, to .cs files of the same name. """
+import re, sys, os, io
+
+SRC = sys.argv[1]
+OUT = sys.argv[2]
+XML = sys.argv[3]
+
+HEADER = '// Generated from %s by ds2cs.py. Edit the D# source instead.\n'
+
+files = re.findall(r'<Compile Include="([^"]+)"', open(os.path.join(SRC, 'Automata.dsproj')).read())
+
+PURE = '[System.Diagnostics.Contracts.Pure] '
+
+def find_static_classes(texts):
+    names = []
+    for t in texts:
+        names += re.findall(r'\bstatic class (\w+)', t)
+    return names
+
+def match_paren(s, i):
+    """s[i] == '(' ; return index of matching ')'."""
+    depth = 0
+    for j in range(i, len(s)):
+        if s[j] == '(':
+            depth += 1
+        elif s[j] == ')':
+            depth -= 1
+            if depth == 0:
+                return j
+    raise ValueError('unbalanced')
+
+def split_params(p):
+    parts, depth, cur = [], 0, ''
+    for ch in p:
+        if ch in '<([':
+            depth += 1
+        elif ch in '>)]':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            parts.append(cur)
+            cur = ''
+        else:
+            cur += ch
+    if cur.strip():
+        parts.append(cur)
+    return [x.strip() for x in parts]
+
+def enclosing_type(s, pos):
+    names = [m for m in re.finditer(r'\b(?:class|struct|interface) (\w+)', s[:pos])]
+    return names[-1].group(1)
+
+def translate(text, statics):
+    # 1. aliases (file scoped; all aliases in a file with the same name agree)
+    aliases = {}
+    def take_alias(m):
+        name, value = m.group(1), m.group(2).strip()
+        assert aliases.get(name, value) == value, name
+        aliases[name] = value
+        return ''
+    text = re.sub(r'^[ \t]*alias (\w+) = ([^;]+);[ \t]*\n(?:[ \t]*\n)?', take_alias, text, flags=re.M)
+    for name, value in aliases.items():
+        text = re.sub(r'\b%s\b' % name, value, text)
+
+    # 2. generic constraints on 'object' mean nothing in C#
+    text = re.sub(r'\n[ \t]*where \w+ : object', '', text)
+
+    # 3. sequence types
+    text = re.sub(r'\[<([^\[\]]+?)>\]', r'IEnumerator<\1>', text)
+    text = re.sub(r'(?<=[(,:\s])\[([A-Za-z_][\w<>, ]*)\](?=\s)', r'IEnumerable<\1>', text)
+
+    # 4. delegate types in parameter lists: R(A) Name -> Func<A, R> Name
+    text = re.sub(r'(?<=[(,])(\s*)(\w+)\((\w+)\)(\s+\w+)', r'\1Func<\3, \2>\4', text)
+
+    # 5. 'next' statements
+    text = re.sub(r'\bnext;', 'continue;', text)
+
+    # 6. constructors: [mods] const this(set A a, ...) ; | { ... }
+    while True:
+        m = re.search(r'(public|private)( const)? this\(', text)
+        if not m:
+            break
+        open_paren = m.end() - 1
+        close = match_paren(text, open_paren)
+        params = split_params(text[open_paren + 1:close])
+        assigns = []
+        newparams = []
+        for p in params:
+            if p.startswith('set '):
+                p = p[4:]
+                assigns.append(p.split()[-1])
+            newparams.append(p)
+        tname = enclosing_type(text, m.start())
+        indent = re.search(r'([ \t]*)$', text[:m.start()]).group(1)
+        rest = text[close + 1:]
+        head = (PURE if m.group(2) else '') + '%s %s(%s)' % (m.group(1), tname, ', '.join(newparams))
+        body_assigns = ''.join('%s    this.%s = %s;\n' % (indent, a, a) for a in assigns)
+        stripped = rest.lstrip()
+        if stripped.startswith(';'):
+            after = stripped[1:]
+            new = head + '\n' + indent + '{\n' + body_assigns + indent + '}' + after
+        else:
+            assert stripped.startswith('{')
+            ws = rest[:len(rest) - len(stripped)]
+            body = stripped[1:]
+            if body_assigns:
+                if body.startswith('\n'):
+                    new = head + ws + '{\n' + body_assigns + body[1:]
+                else:
+                    # single line body such as '{ HasValue = true; }'
+                    new = head + '\n' + indent + '{\n' + body_assigns + indent + '   ' + body.replace('}', '\n' + indent + '}', 1)
+            else:
+                new = head + ws + '{' + body
+        text = text[:m.start()] + new
+
+    # 7. accessors
+    text = re.sub(r'const get\s+return ([^;]*);', r'%sget { return \1; }' % PURE, text)
+    text = re.sub(r'^([ \t]*)get\s+return ([^;]*);', r'\1get { return \2; }', text, flags=re.M)
+    text = re.sub(r'^([ \t]*)set\n\s+([^;]*;)', r'\1set { \2 }', text, flags=re.M)
+    text = re.sub(r'\bconst get\b', PURE + 'get', text)
+
+    # 8. const methods (but not constant fields)
+    def const_method(m):
+        indent, mods, rest = m.group(1), m.group(2) or '', m.group(3)
+        if '(' not in rest or ('=' in rest and rest.index('=') < rest.index('(')):
+            return m.group(0)
+        mm = re.match(r'((?:(?:override|static) )*)const (.*)', rest)
+        if mm:
+            rest = mm.group(1) + mm.group(2)
+        return indent + PURE + mods + rest
+    text = re.sub(r'^([ \t]*)((?:(?:public|private|static|override) )*)const (.*)$', const_method, text, flags=re.M)
+    text = re.sub(r'^([ \t]*)(public|private)( override)? ' + re.escape(PURE), r'\1' + PURE + r'\2\3 ', text, flags=re.M)
+    text = text.replace('public ' + PURE, PURE + 'public ')
+
+    # 9. ToString overrides object.ToString in classes/structs
+    text = re.sub(r'(public )(string ToString\(\))', r'\1override \2', text)
+
+    # 10. explicit interface implementations with a different name
+    def explicit_impl(m):
+        indent, attrs, ret, name, iface, iname = m.groups()[:6]
+        return ('%s%spublic %s %s()\n' % (indent, attrs, ret, name) + m.group(7) +
+                '\n\n%s%s %s.%s()\n%s{\n%s    return %s();\n%s}' % (indent, ret, iface, iname, indent, indent, name, indent))
+    text = re.sub(r'^([ \t]*)((?:\[[^\]]*\] )*)public (.+?) (\w+)\(\) : ([\w.<>, ]+)\.(\w+)\n((?:.*\n)*?\1\})',
+                  explicit_impl, text, flags=re.M)
+
+    # 11. static classes are singletons with an 'Instance' property
+    for name in statics:
+        text = re.sub(r'\b%s\.(?!Instance\b)(?=\w)' % name, name + '.Instance.', text)
+        text = re.sub(r'return %s;' % name, 'return %s.Instance;' % name, text)
+    def static_class(m):
+        indent, name, bases = m.group(1), m.group(2), m.group(3) or ''
+        return ('%spublic sealed class %s%s\n%s{\n%s    private %s() { }\n\n%s    private static %s %s_instance_value = new %s();\n\n'
+                '%s    public static %s Instance { get { return %s_instance_value; } }\n'
+                % (indent, name, bases, indent, indent, name, indent, name, name, name, indent, name, name))
+    text = re.sub(r'^([ \t]*)public static class (\w+)( : \w+)?\n[ \t]*\{\n', static_class, text, flags=re.M)
+
+    # 12. cast from char to string
+    text = text.replace('(string)Literal', 'Literal.ToString()')
+
+    # 13. '==' on values of generic type compares with Equals
+    text = text.replace('PerformTransition(pq.Key, sym) == ab.Key',
+                        'EqualityComparer<TState>.Default.Equals(PerformTransition(pq.Key, sym), ab.Key)')
+    text = text.replace('PerformTransition(pq.Value, sym) == ab.Value',
+                        'EqualityComparer<TState>.Default.Equals(PerformTransition(pq.Value, sym), ab.Value)')
+    text = text.replace('Value == Other.Value', 'EqualityComparer<T>.Default.Equals(Value, Other.Value)')
+
+    # 14. struct instance members are all public non-virtual; interface
+    # members lose their access modifiers
+    if 'using System.Collections.Generic;' not in text:
+        text = 'using System.Collections.Generic;\n' + text
+    return text
+
+texts = [open(os.path.join(SRC, f)).read() for f in files]
+statics = find_static_classes(texts)
+if not os.path.isdir(OUT):
+    os.makedirs(OUT)
+for f, t in zip(files, texts):
+    code = translate(t, statics)
+    if 'using System;' not in t:
+        code = 'using System;\n' + code
+    with io.open(os.path.join(OUT, f[:-3] + '.cs'), 'w', newline='\n') as cs:
+        cs.write(u'' + HEADER % f + code)
+
+# XML documentation
+
+PRIMS = {'int': 'System.Int32', 'char': 'System.Char', 'bool': 'System.Boolean',
+         'string': 'System.String', 'object': 'System.Object', 'void': 'System.Void'}
+BCL = {'Dictionary': 'System.Collections.Generic', 'List': 'System.Collections.Generic',
+       'HashSet': 'System.Collections.Generic', 'KeyValuePair': 'System.Collections.Generic',
+       'IEnumerable': 'System.Collections.Generic', 'IEnumerator': 'System.Collections.Generic',
+       'IEqualityComparer': 'System.Collections.Generic', 'Stack': 'System.Collections.Generic',
+       'Tuple': 'System'}
+
+def parse_type(s, generics, aliases):
+    s = s.strip()
+    if s in aliases:
+        return parse_type(aliases[s], generics, aliases)
+    m = re.match(r'^\[<(.*)>\]$', s)
+    if m:
+        return 'System.Collections.Generic.IEnumerator`1{%s}' % parse_type(m.group(1), generics, aliases)
+    m = re.match(r'^\[(.*)\]$', s)
+    if m:
+        return 'System.Collections.Generic.IEnumerable`1{%s}' % parse_type(m.group(1), generics, aliases)
+    m = re.match(r'^(\w+)\((\w+)\)$', s)
+    if m:
+        return '%s(%s)' % (parse_type(m.group(1), generics, aliases), parse_type(m.group(2), generics, aliases))
+    if s.endswith('[]'):
+        return parse_type(s[:-2], generics, aliases) + '[]'
+    m = re.match(r'^([\w.]+)<(.*)>$', s)
+    if m:
+        args = [parse_type(a, generics, aliases) for a in split_params(m.group(2))]
+        base = m.group(1)
+        ns = BCL.get(base, 'Automata')
+        return '%s.%s`%d{%s}' % (ns, base, len(args), ','.join(args))
+    if s in PRIMS:
+        return PRIMS[s]
+    if s in generics:
+        return s
+    if '.' in s:
+        return s
+    return '%s.%s' % (BCL.get(s, 'Automata'), s)
+
+def summary_text(lines):
+    # dsc strips the '///' and a single space after it, and joins the lines
+    # with spaces.
+    parts = []
+    for l in lines:
+        l = l.strip()[3:].rstrip()
+        parts.append(l[1:] if l.startswith(' ') else l)
+    return ' '.join(parts)
+
+members = []
+declPattern = re.compile(r'^\s*((public|private|protected|static|const|override|abstract|virtual) )+')
+for f, text in zip(files, texts):
+    lines = text.split('\n')
+    i = 0
+    while i < len(lines):
+        doc = None
+        if lines[i].strip().startswith('///'):
+            doc = []
+            while lines[i].strip().startswith('///'):
+                doc.append(lines[i])
+                i += 1
+            doc = summary_text(doc)
+        elif not (declPattern.match(lines[i]) and '(' in lines[i]):
+            i += 1
+            continue
+        decl = lines[i].strip()
+        j = i
+        while '(' in decl and ')' not in decl:
+            j += 1
+            decl += ' ' + lines[j].strip()
+        members.append((f, i, decl, doc))
+        i += 1
+
+def type_decl(decl):
+    m = re.search(r'\b(?:class|struct|interface) (\w+)(?:<([^>]*)>)?', decl)
+    return m.group(1), [x.strip() for x in m.group(2).split(',')] if m.group(2) else []
+
+def base_names(decl):
+    m = re.search(r'\b(?:class|struct|interface) \w+(?:<[^>]*>)?\s*:\s*(.*)$', decl)
+    return [re.match(r'\W*(\w+)', b).group(1) for b in split_params(m.group(1))] if m else []
+
+out = []
+interfaceDocs = {}
+for f, text in zip(files, texts):
+    aliases = dict(re.findall(r'alias (\w+) = ([^;]+);', text))
+    lines = text.split('\n')
+    entries = [(i, decl, doc) for (ff, i, decl, doc) in members if ff == f]
+    typeDecls = [(i, l) for i, l in enumerate(lines) if re.search(r'^\s*(public |private )*(static )?(class|struct|interface) \w+', l)]
+    groups = []
+    for ti, tl in typeDecls:
+        name, gens = type_decl(tl)
+        groups.append([ti, name, gens, None, [], [], [], base_names(tl), 'interface ' in tl])
+    for i, decl, doc in entries:
+        owner = [g for g in groups if g[0] <= i]
+        if re.search(r'\b(class|struct|interface) ', decl):
+            g = [g for g in groups if g[0] == i][0]
+            g[3] = doc
+            continue
+        g = owner[-1]
+        tid = 'Automata.%s%s' % (g[1], '`%d' % len(g[2]) if g[2] else '')
+        if re.search(r'\bthis\(', decl):
+            continue
+        paren = decl.find('(')
+        if paren >= 0 and '=' not in decl[:paren]:
+            hm = re.search(r'(\w+)(<[^<>]*>)?\s*$', decl[:paren])
+            name, mgens = hm.group(1), hm.group(2)
+            params = decl[paren + 1:decl.rindex(')')]
+            mg = [x.strip() for x in mgens[1:-1].split(',')] if mgens else []
+            ps = [parse_type(' '.join(p.replace('set ', '').split()[:-1]), g[2] + mg, aliases) for p in split_params(params)]
+            mid = 'M:%s.%s%s%s' % (tid, name, '``%d' % len(mg) if mg else '', '(%s)' % ','.join(ps) if ps else '')
+            if g[8] and doc:
+                interfaceDocs[(g[1], name)] = doc
+            g[4].append((mid, doc, name))
+        elif doc is None:
+            continue
+        elif not decl.endswith(';'):
+            name = re.search(r'(\w+)\s*(\{.*)?$', decl).group(1)
+            g[5].append(('P:%s.%s' % (tid, name), doc))
+        else:
+            name = re.search(r'(\w+)\s*(=.*)?;$', decl).group(1)
+            g[6].append(('F:%s.%s' % (tid, name), doc))
+    for ti, name, gens, tdoc, ms, ps, fs, bases, isInterface in groups:
+        tid = 'Automata.%s%s' % (name, '`%d' % len(gens) if gens else '')
+        if tdoc:
+            out.append(('T:' + tid, tdoc))
+        for mid, doc, mname in ms:
+            if doc is None:
+                # Undocumented members inherit the documentation of the
+                # interface members that they implement.
+                docs = [interfaceDocs[(b, mname)] for b in bases if (b, mname) in interfaceDocs]
+                if not docs:
+                    continue
+                doc = docs[0]
+            out.append((mid, doc))
+        out.extend(ps)
+        out.extend(fs)
+
+with io.open(XML, 'w', newline='\n') as x:
+    x.write(u'<?xml version="1.0"?>\n<doc>\n  <assembly>\n    <name>Automata</name>\n  </assembly>\n  <members>\n')
+    for name, doc in out:
+        x.write(u'    <member name="%s">\n      %s\n    </member>\n' % (name, doc))
+    x.write(u'  </members>\n</doc>')
@@ -0,0 +1,39 @@
+// Reference-only declarations of the parts of System.Core 4.0 that Automata uses.
+using System.Collections.Generic;
+using System.Reflection;
+[assembly: AssemblyVersion("4.0.0.0")]
+namespace System.Collections.Generic
+{
+    public class HashSet<T> : IEnumerable<T>
+    {
+        public HashSet() { }
+        public HashSet(IEnumerable<T> collection) { }
+        public int Count { get { throw null; } }
+        public bool Add(T item) { throw null; }
+        public bool Contains(T item) { throw null; }
+        public bool Remove(T item) { throw null; }
+        public void UnionWith(IEnumerable<T> other) { }
+        public static IEqualityComparer<HashSet<T>> CreateSetComparer() { throw null; }
+        public Enumerator GetEnumerator() { throw null; }
+        IEnumerator<T> IEnumerable<T>.GetEnumerator() { throw null; }
+        System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator() { throw null; }
+        public struct Enumerator : IEnumerator<T>
+        {
+            public T Current { get { throw null; } }
+            object System.Collections.IEnumerator.Current { get { throw null; } }
+            public bool MoveNext() { throw null; }
+            void System.Collections.IEnumerator.Reset() { }
+            public void Dispose() { }
+        }
+    }
+}
+namespace System.Linq
+{
+    public static class Enumerable
+    {
+        public static TSource First<TSource>(this IEnumerable<TSource> source) { throw null; }
+        public static bool Any<TSource>(this IEnumerable<TSource> source) { throw null; }
+        public static IEnumerable<TSource> Intersect<TSource>(this IEnumerable<TSource> first, IEnumerable<TSource> second) { throw null; }
+        public static IEnumerable<TResult> Select<TSource, TResult>(this IEnumerable<TSource> source, Func<TSource, TResult> selector) { throw null; }
+    }
+}
@@ -0,0 +1,16 @@
+// Reference-only declarations of the parts of System 4.0 that Automata uses.
+using System.Collections.Generic;
+using System.Reflection;
+[assembly: AssemblyVersion("4.0.0.0")]
+namespace System.Collections.Generic
+{
+    public class Stack<T> : IEnumerable<T>
+    {
+        public Stack() { }
+        public int Count { get { throw null; } }
+        public void Push(T item) { }
+        public T Pop() { throw null; }
+        IEnumerator<T> IEnumerable<T>.GetEnumerator() { throw null; }
+        System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator() { throw null; }
+    }
+}
@@ -0,0 +1,179 @@
+// Reference-only declarations of the parts of mscorlib 4.0 that Automata uses.
+using System.Reflection;
+[assembly: AssemblyVersion("4.0.0.0")]
+namespace System
+{
+    public class Object
+    {
+        public Object() { }
+        public virtual bool Equals(object obj) { throw null; }
+        public static bool Equals(object objA, object objB) { throw null; }
+        public virtual int GetHashCode() { throw null; }
+        public virtual string ToString() { throw null; }
+        public Type GetType() { throw null; }
+        ~Object() { }
+    }
+    public abstract class ValueType { protected ValueType() { } public override bool Equals(object obj) { throw null; } public override int GetHashCode() { throw null; } public override string ToString() { throw null; } }
+    public abstract class Enum : ValueType { protected Enum() { } }
+    public struct Void { }
+    public struct Boolean { }
+    public struct Char { public override string ToString() { throw null; } }
+    public struct SByte { }
+    public struct Byte { }
+    public struct Int16 { }
+    public struct UInt16 { }
+    public struct Int32 { }
+    public struct UInt32 { }
+    public struct Int64 { }
+    public struct UInt64 { }
+    public struct Single { }
+    public struct Double { }
+    public struct IntPtr { }
+    public struct UIntPtr { }
+    public struct Nullable<T> where T : struct { }
+    public struct RuntimeTypeHandle { }
+    public struct RuntimeFieldHandle { }
+    public struct RuntimeMethodHandle { }
+    public sealed class String : System.Collections.IEnumerable
+    {
+        private String() { }
+        public int Length { get { throw null; } }
+        [System.Runtime.CompilerServices.IndexerName("Chars")]
+        public char this[int index] { get { throw null; } }
+        public static string Concat(string str0, string str1) { throw null; }
+        public static string Concat(string str0, string str1, string str2) { throw null; }
+        public static string Concat(string str0, string str1, string str2, string str3) { throw null; }
+        public static bool operator ==(string a, string b) { throw null; }
+        public static bool operator !=(string a, string b) { throw null; }
+        public override bool Equals(object obj) { throw null; }
+        public override int GetHashCode() { throw null; }
+        System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator() { throw null; }
+    }
+    public abstract class Array { private Array() { } public int Length { get { throw null; } } }
+    public abstract class Type { protected Type() { } public static Type GetTypeFromHandle(RuntimeTypeHandle handle) { throw null; } }
+    public class Exception { public Exception() { } }
+    public abstract class Delegate { protected Delegate(object target, string method) { } }
+    public abstract class MulticastDelegate : Delegate { protected MulticastDelegate(object target, string method) : base(target, method) { } }
+    public delegate TResult Func<in T, out TResult>(T arg);
+    public interface IDisposable { void Dispose(); }
+    public class Tuple<T1, T2, T3>
+    {
+        public Tuple(T1 item1, T2 item2, T3 item3) { }
+        public T1 Item1 { get { throw null; } }
+        public T2 Item2 { get { throw null; } }
+        public T3 Item3 { get { throw null; } }
+    }
+    public abstract class Attribute { protected Attribute() { } }
+    [Flags]
+    public enum AttributeTargets { Assembly = 1, Module = 2, Class = 4, Struct = 8, Enum = 16, Constructor = 32, Method = 64, Property = 128, Field = 256, Event = 512, Interface = 1024, Parameter = 2048, Delegate = 4096, ReturnValue = 8192, GenericParameter = 16384, All = 32767 }
+    public sealed class AttributeUsageAttribute : Attribute
+    {
+        public AttributeUsageAttribute(AttributeTargets validOn) { }
+        public bool AllowMultiple { get { throw null; } set { } }
+        public bool Inherited { get { throw null; } set { } }
+    }
+    public class FlagsAttribute : Attribute { }
+    public sealed class ParamArrayAttribute : Attribute { }
+}
+namespace System.Collections
+{
+    public interface IEnumerable { IEnumerator GetEnumerator(); }
+    public interface IEnumerator { object Current { get; } bool MoveNext(); void Reset(); }
+}
+namespace System.Collections.Generic
+{
+    public interface IEnumerable<out T> : System.Collections.IEnumerable { new IEnumerator<T> GetEnumerator(); }
+    public interface IEnumerator<out T> : IDisposable, System.Collections.IEnumerator { new T Current { get; } }
+    public interface IEqualityComparer<in T> { bool Equals(T x, T y); int GetHashCode(T obj); }
+    public abstract class EqualityComparer<T> : IEqualityComparer<T>
+    {
+        protected EqualityComparer() { }
+        public static EqualityComparer<T> Default { get { throw null; } }
+        public abstract bool Equals(T x, T y);
+        public abstract int GetHashCode(T obj);
+    }
+    public struct KeyValuePair<TKey, TValue>
+    {
+        public KeyValuePair(TKey key, TValue value) { }
+        public TKey Key { get { throw null; } }
+        public TValue Value { get { throw null; } }
+    }
+    public class List<T> : IEnumerable<T>
+    {
+        public List() { }
+        public List(IEnumerable<T> collection) { }
+        public int Count { get { throw null; } }
+        public T this[int index] { get { throw null; } set { } }
+        public void Add(T item) { }
+        public Enumerator GetEnumerator() { throw null; }
+        IEnumerator<T> IEnumerable<T>.GetEnumerator() { throw null; }
+        System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator() { throw null; }
+        public struct Enumerator : IEnumerator<T>
+        {
+            public T Current { get { throw null; } }
+            object System.Collections.IEnumerator.Current { get { throw null; } }
+            public bool MoveNext() { throw null; }
+            void System.Collections.IEnumerator.Reset() { }
+            public void Dispose() { }
+        }
+    }
+    public class Dictionary<TKey, TValue> : IEnumerable<KeyValuePair<TKey, TValue>>
+    {
+        public Dictionary() { }
+        public int Count { get { throw null; } }
+        public TValue this[TKey key] { get { throw null; } set { } }
+        public void Add(TKey key, TValue value) { }
+        public bool ContainsKey(TKey key) { throw null; }
+        public Enumerator GetEnumerator() { throw null; }
+        IEnumerator<KeyValuePair<TKey, TValue>> IEnumerable<KeyValuePair<TKey, TValue>>.GetEnumerator() { throw null; }
+        System.Collections.IEnumerator System.Collections.IEnumerable.GetEnumerator() { throw null; }
+        public struct Enumerator : IEnumerator<KeyValuePair<TKey, TValue>>
+        {
+            public KeyValuePair<TKey, TValue> Current { get { throw null; } }
+            object System.Collections.IEnumerator.Current { get { throw null; } }
+            public bool MoveNext() { throw null; }
+            void System.Collections.IEnumerator.Reset() { }
+            public void Dispose() { }
+        }
+    }
+}
+namespace System.Diagnostics
+{
+    public sealed class DebuggableAttribute : Attribute
+    {
+        [Flags]
+        public enum DebuggingModes { None = 0, Default = 1, IgnoreSymbolStoreSequencePoints = 2, EnableEditAndContinue = 4, DisableOptimizations = 256 }
+        public DebuggableAttribute(DebuggingModes modes) { }
+    }
+    public enum DebuggerBrowsableState { Never = 0, Collapsed = 2, RootHidden = 3 }
+    public sealed class DebuggerBrowsableAttribute : Attribute { public DebuggerBrowsableAttribute(DebuggerBrowsableState state) { } }
+}
+namespace System.Diagnostics.Contracts
+{
+    public sealed class PureAttribute : Attribute { }
+}
+namespace System.Reflection
+{
+    public sealed class DefaultMemberAttribute : Attribute { public DefaultMemberAttribute(string memberName) { } }
+    public sealed class AssemblyVersionAttribute : Attribute { public AssemblyVersionAttribute(string version) { } }
+}
+namespace System.Runtime.CompilerServices
+{
+    public sealed class CompilerGeneratedAttribute : Attribute { }
+    public sealed class IndexerNameAttribute : Attribute { public IndexerNameAttribute(string indexerName) { } }
+    public class CompilationRelaxationsAttribute : Attribute { public CompilationRelaxationsAttribute(int relaxations) { } }
+    public sealed class RuntimeCompatibilityAttribute : Attribute { public RuntimeCompatibilityAttribute() { } public bool WrapNonExceptionThrows { get { throw null; } set { } } }
+    public sealed class ExtensionAttribute : Attribute { }
+}
+namespace System.Runtime.Versioning
+{
+    public sealed class TargetFrameworkAttribute : Attribute
+    {
+        public TargetFrameworkAttribute(string frameworkName) { }
+        public string FrameworkDisplayName { get { throw null; } set { } }
+    }
+}
+namespace System.Text
+{
+    public sealed class StringBuilder { public StringBuilder() { } }
+}
@@ -1,6 +1,10 @@
 from Parser import *
 from Encoding import *
+import bisect
+from collections import OrderedDict
 import Symbols
+import Templates
+from libdiagnostics import DiagnosticsException
 
 from Builders import builders
 
@@ -8,8 +12,15 @@ class Assembler(object):
     """ Converts a list of instructions and labels to bytecode. """
 
     def __init__(self, baseOffset = None, relocateAbsolutes = True):
-        # A list of byte values representing the bytecode.
-        self.code = []
+        # A buffer of bytes representing the bytecode. Operands that cannot
+        # be written yet are represented by placeholder zero bytes.
+        self.code = bytearray()
+
+        # A dictionary that maps symbol names to lists of fixups for the
+        # placeholders in the bytecode buffer. Every fixup is an
+        # (offset, width, operand) tuple. Fixups whose operand does not refer
+        # to a symbol are stored under None.
+        self.fixups = {}
 
         # The base offset is absolutely necessary for absolute things,
         # but we may choose to provide it later on.
@@ -20,14 +31,37 @@ class Assembler(object):
         # making it the linker's problem.
         self.relocateAbsolutes = relocateAbsolutes
 
-        # A dictionary of symbols (these include labels).
-        self.symbols = {}
+        # A dictionary of symbols (these include labels), in the order in which
+        # they were first encountered.
+        self.symbols = OrderedDict()
+
+        # A dictionary that maps offsets to the first local symbol that was
+        # defined at that offset, and a sorted list of said offsets.
+        self.symbolsByOffset = {}
+        self.symbolOffsets = []
 
         # A list of relocation records, which are SymbolOperand objects.
         self.relocations = []
 
         self.index = 0
 
+        # A list of all nodes that have been processed, so they can be
+        # reassembled when a branch must be relaxed, and the set of the
+        # indices of the nodes that could not be processed.
+        self.nodes = []
+        self.failedNodes = set()
+
+        # A list of (node index, operand) pairs for all branches that have
+        # been written in their short form, and a set of the indices of the
+        # nodes whose branches must be written in their long form.
+        self.shortBranches = []
+        self.longBranches = set()
+
+        # A dictionary that maps mnemonics to the number of instructions that
+        # were written in a shorter form than their general one, and the
+        # number of bytes that saved, as [count, bytes] lists.
+        self.savedBytes = {}
+
     def getSymbol(self, name):
         """ Gets the symbol with the given name. 
             If no such symbol exists, one will be appointed to you.  """
@@ -38,11 +72,26 @@ class Assembler(object):
     def getSymbolAt(self, offset):
         """ Gets the symbol at the given offset. 
             If no such symbol exists, one will be appointed to you.  """
-        for item in self.symbols:
-            if item.offset == offset:
-                return item
+        if offset in self.symbolsByOffset:
+            return self.symbolsByOffset[offset]
         return self.defineSymbol(Symbols.LocalSymbol("#" + hex(offset), offset))
 
+    def getSymbolAtOrBelow(self, offset):
+        """ Gets the symbol with the greatest offset that is less than or equal
+        to the given offset, or None if there is no such symbol. """
+        i = bisect.bisect_right(self.symbolOffsets, offset)
+        if i == 0:
+            return None
+        return self.symbolsByOffset[self.symbolOffsets[i - 1]]
+
+    def indexSymbol(self, symbol):
+        """ Adds the given symbol to the offset index, if it is a defined
+        local symbol, and no other symbol has been defined at its offset. """
+        if symbol.isExternal or not symbol.isDefined or symbol.offset in self.symbolsByOffset:
+            return
+        self.symbolsByOffset[symbol.offset] = symbol
+        bisect.insort(self.symbolOffsets, symbol.offset)
+
     def hasSymbol(self, name):
         """ Finds out if there is a symbol with the given name. """
         return name in self.symbols
@@ -53,38 +102,162 @@ class Assembler(object):
             self.symbols[symbol.name].define(symbol)
         else:
             self.symbols[symbol.name] = symbol
+        self.indexSymbol(self.symbols[symbol.name])
+
+        # Patch the references to this symbol right away.
+        if symbol.name in self.fixups:
+            self.patchSymbol(symbol.name)
 
         return self.getSymbol(symbol.name)
 
+    def patchSymbol(self, name):
+        """ Patches the fixups for the symbol with the given name. Every fixup
+        whose operand can be written is patched in place; the others remain
+        pending. """
+        pending = []
+        for fixup in self.fixups[name]:
+            offset, width, operand = fixup
+            if operand.canWrite(self):
+                self.code[offset:offset + width] = bytearray(operand.getData(self))
+            else:
+                pending.append(fixup)
+        if pending:
+            self.fixups[name] = pending
+        else:
+            del self.fixups[name]
+
+    def recordSavedBytes(self, name, count):
+        """ Records that an instruction with the given mnemonic was written in
+        a form that is `count` bytes shorter than its general form. """
+        saved = self.savedBytes.setdefault(name, [0, 0])
+        saved[0] += 1
+        saved[1] += count
+
+    def isLongBranch(self):
+        """ Tells if the branch instruction that is currently being assembled
+        must be written in its long form. """
+        return len(self.nodes) - 1 in self.longBranches
+
+    def addShortBranch(self, operand):
+        """ Registers the relative operand of a branch instruction that is
+        currently being written in its short form. """
+        self.shortBranches.append((len(self.nodes) - 1, operand))
+
+    def fitsShortBranch(self, operand):
+        """ Checks if the given short branch operand's displacement fits in a
+        single signed byte. """
+        symbol = operand.symbol
+        if symbol.isExternal or not symbol.isDefined:
+            return False
+        return -0x80 <= symbol.offset - operand.relativeOffset <= 0x7f
+
+    def relax(self):
+        """ Relaxes branches. All branches start out in their short form; the
+        ones whose displacement does not fit in a byte are grown to their long
+        form, and all nodes are reassembled. Growing a branch can push other
+        branches out of range, so this is repeated until a fixed point is
+        reached. Branches only ever grow, so that is bound to happen. """
+        while True:
+            grown = [index for index, operand in self.shortBranches
+                     if not self.fitsShortBranch(operand)]
+            if not grown:
+                return
+            self.longBranches.update(grown)
+            self.reassemble()
+
+    def reassemble(self):
+        """ Discards the bytecode, symbols and relocations, and processes all
+        nodes again. Every round of relaxation thus costs as much as the first
+        pass over the nodes did, but only programs with branches that do not
+        fit in a byte need any rounds at all. The nodes that could not be
+        processed the first time fail again, and their errors are not reported
+        twice. Errors in any other node are raised, as they mean that
+        reassembling the nodes gave a different result. """
+        nodes = self.nodes
+        failedNodes = set(self.failedNodes)
+        self.code = bytearray()
+        self.fixups = {}
+        self.symbols = OrderedDict()
+        self.symbolsByOffset = {}
+        self.symbolOffsets = []
+        self.relocations = []
+        self.index = 0
+        self.nodes = []
+        self.shortBranches = []
+        self.savedBytes = {}
+        for index, node in enumerate(nodes):
+            try:
+                self.process(node)
+            except (ValueError, DiagnosticsException):
+                if index not in failedNodes:
+                    raise
+
     def patchLabels(self):
-        """ Patches all labels. """
-        i = 0
-        while i < len(self.code):
-            if isinstance(self.code[i], Instructions.Operand) and self.code[i].canWrite(self):
-                self.code[i:i+1] = self.code[i].getData(self)
-            i += 1
+        """ Relaxes branches, and then patches all labels. Fixups that cannot
+        be written yet, for example because they refer to an undefined label,
+        remain pending. """
+        self.relax()
+        for name in list(self.fixups.keys()):
+            self.patchSymbol(name)
+
+    def getPendingFixups(self):
+        """ Gets a list of all pending fixups, sorted by offset. """
+        return sorted(fixup for fixups in self.fixups.values() for fixup in fixups)
+
+    def getPendingReferences(self):
+        """ Gets a list of (symbol name, offset) pairs for all pending
+        references to symbols, sorted by offset. """
+        return [(operand.symbolName, offset) for offset, width, operand in self.getPendingFixups()
+                if operand.symbolName is not None]
+
+    def listing(self, start = 0):
+        """ Creates a list of the bytes in the bytecode buffer, starting at the
+        given offset. Every pending fixup's placeholder bytes are replaced by
+        its operand. """
+        results = []
+        index = start
+        for offset, width, operand in self.getPendingFixups():
+            if offset < start:
+                continue
+            results.extend(self.code[index:offset])
+            results.append(operand)
+            index = offset + width
+        results.extend(self.code[index:])
+        return results
+
+    def getCodeView(self):
+        """ Gets a memoryview of the bytecode buffer, which can be handed to
+        output routines without copying the buffer. """
+        return memoryview(self.code)
 
     def process(self, node):
-        if isinstance(node, LabelNode):
-            self.defineSymbol(Symbols.LocalSymbol(node.name.contents, self.index, False))
-        elif isinstance(node, InstructionNode):
-            self.processInstruction(node)
-        elif isinstance(node, DirectiveNodeBase):
-            node.apply(self)
-        else:
-            raise ValueError('invalid assembly node')
+        self.nodes.append(node)
+        try:
+            if isinstance(node, LabelNode):
+                self.defineSymbol(Symbols.LocalSymbol(node.name.contents, self.index, False))
+            elif isinstance(node, InstructionNode):
+                self.processInstruction(node)
+            elif isinstance(node, DirectiveNodeBase):
+                node.apply(self)
+            else:
+                raise ValueError('invalid assembly node')
+        except (ValueError, DiagnosticsException):
+            self.failedNodes.add(len(self.nodes) - 1)
+            raise
 
     def writeArgument(self, arg):
         """ Writes an argument, possibly resolving it later on. """
         if arg.canWrite(self):
             arg.writeDataTo(self)
         else:
-            self.code += [arg]
+            fixup = (self.index, arg.dataSize, arg)
+            self.fixups.setdefault(arg.symbolName, []).append(fixup)
+            self.code.extend(bytearray(arg.dataSize))
             self.index += arg.dataSize
 
     def write(self, bytes):
-        """ Write several bytes to our bytecode list. """
-        self.code += bytes
+        """ Write several bytes to our bytecode buffer. """
+        self.code.extend(bytes)
         self.index += len(bytes)
 
     def processInstruction(self, node):
@@ -92,6 +265,24 @@ class Assembler(object):
         op = str(node.mnemonic)
 
         if op in builders:
-            builders[op](self, node.argumentList.toOperands(self))
+            Templates.writeInstruction(self, op, node.argumentList.toOperands(self))
         else:
-            raise ValueError('unknown opcode')
\ No newline at end of file
+            raise ValueError('unknown opcode')
+
+def processNode(asm, node, span):
+    """ Processes a syntax node. `span` is an object whose `location` is used
+    to report errors. """
+    try:
+        asm.process(node)
+    except ValueError as ex:
+        raise DiagnosticsException('Invalid', str(ex), span.location)
+
+def processLocatedInstructions(asm, instrs, log):
+    """ Processes a sequence of (node, TokenSpan) pairs, and logs errors.
+    Lexer errors are expected to be logged, and recovered from, by the
+    sequence itself. """
+    for node, span in instrs:
+        try:
+            processNode(asm, node, span)
+        except DiagnosticsException as ex:
+            log.LogError(ex.Entry)
@@ -0,0 +1,175 @@
+import clr
+clr.AddReference("Automata.dll")
+clr.AddReference("libcoff.dll")
+clr.AddReference("libdiagnostics.dll")
+import os
+import sys
+import threading
+import Queue
+import Assembler
+import Lexer
+import LineCache
+import Output
+import Parallel
+import libdiagnostics
+from Incremental import DiagnosticsList
+from libdiagnostics import DiagnosticsException
+
+# The output modes that assembleMany supports, and the extensions of the files
+# that they write. The "code" mode does not write a file.
+outputExtensions = { "coff" : ".o", "com" : ".com", "code" : None }
+
+class WorkerPool(object):
+    """ A pool of persistent worker threads. The threads are started once, and
+    wait for work in between calls to map, so state that they warm up, such as
+    the lexer and the instruction templates, carries over from one batch to
+    the next. """
+
+    def __init__(self, threadCount = None):
+        if threadCount is None:
+            threadCount = Parallel.getProcessorCount()
+        elif threadCount < 1:
+            raise ValueError("a worker pool needs at least one thread, not %d" % threadCount)
+        self.threadCount = threadCount
+        self.tasks = Queue.Queue()
+        self.threads = [threading.Thread(target=self.work) for _ in range(threadCount)]
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            function, item, results, index, done = task
+            try:
+                results[index] = (True, function(item))
+            except Exception:
+                results[index] = (False, sys.exc_info())
+            done.release()
+
+    def map(self, function, items):
+        """ Applies the given function to the given items on the pool's threads,
+        and returns the results in order. The exception that is raised for the
+        first item whose function call failed, if any, is raised again on the
+        calling thread. """
+        items = list(items)
+        results = [None] * len(items)
+        done = threading.Semaphore(0)
+        for index, item in enumerate(items):
+            self.tasks.put((function, item, results, index, done))
+        for _ in items:
+            done.acquire()
+        for succeeded, result in results:
+            if not succeeded:
+                errorType, error, traceback = result
+                raise errorType, error, traceback
+        return [result for succeeded, result in results]
+
+    def close(self):
+        """ Stops the pool's threads once they have finished their work. """
+        for _ in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+class AssemblyResult(object):
+    """ The result of assembling a single file. `output` is the path of the file
+    that was written, or the bytecode in the "code" mode. It is None if the
+    file could not be read. `diagnostics` is a list of log entries, and
+    `pendingReferences` is a list of (symbol name, offset) pairs for the
+    references to symbols that could not be resolved. """
+
+    def __init__(self, path, output, diagnostics, pendingReferences):
+        self.path = path
+        self.output = output
+        self.diagnostics = diagnostics
+        self.pendingReferences = pendingReferences
+
+    @property
+    def succeeded(self):
+        """ Tells if the file was assembled without diagnostics. """
+        return self.output is not None and not self.diagnostics
+
+def assembleFile(path, mode, lineCache = None):
+    """ Assembles the file at the given path serially, writes its output in the
+    given mode, and returns an AssemblyResult. Diagnostics are collected
+    rather than printed. If an error ends the assembly of the file, then it is
+    the last diagnostic, and the result's output is None. """
+    log = DiagnosticsList()
+    try:
+        with open(path, "r") as f:
+            doc = libdiagnostics.SourceDocument(f.read(), path)
+    except (IOError, OSError) as ex:
+        doc = libdiagnostics.SourceDocument("", path)
+        log.LogError('Invalid', str(ex), libdiagnostics.SourceLocation(doc, 0, 0))
+        return AssemblyResult(path, None, log.entries, [])
+
+    # Errors that end the assembly of this file, such as unknown directives,
+    # or relocations that cannot be written, are reported as diagnostics of
+    # this file, so the other files in the batch are not affected.
+    try:
+        asm = Assembler.Assembler()
+        instrs = Parallel.parseRange(doc, log, lineCache, 0, len(doc.Source))
+        Assembler.processLocatedInstructions(asm, instrs, log)
+
+        if mode == "coff":
+            Output.prepareObjectFile(asm)
+            output = os.path.splitext(path)[0] + outputExtensions[mode]
+            Output.writeObjectFile(asm, output)
+        elif mode == "com":
+            Output.prepareComFile(asm)
+            output = os.path.splitext(path)[0] + outputExtensions[mode]
+            Output.writeComFile(asm, output)
+        else:
+            asm.patchLabels()
+            output = bytearray(asm.code)
+    except ValueError as ex:
+        log.LogError('Invalid', str(ex), libdiagnostics.SourceLocation(doc, 0, 0))
+        return AssemblyResult(path, None, log.entries, [])
+    except DiagnosticsException as ex:
+        log.LogError(ex.Entry)
+        return AssemblyResult(path, None, log.entries, [])
+    return AssemblyResult(path, output, log.entries, asm.getPendingReferences())
+
+# The worker pool that assembleMany uses by default. It is created by the first
+# call to assembleMany, and reused by later calls that ask for as many threads.
+defaultPool = None
+defaultPoolLock = threading.Lock()
+
+def getDefaultPool(threadCount = None):
+    """ Gets the default worker pool, and replaces it if it does not have the
+    given number of threads. """
+    global defaultPool
+    if threadCount is None:
+        threadCount = Parallel.getProcessorCount()
+    elif threadCount < 1:
+        raise ValueError("a worker pool needs at least one thread, not %d" % threadCount)
+    with defaultPoolLock:
+        if defaultPool is None or defaultPool.threadCount != threadCount:
+            if defaultPool is not None:
+                defaultPool.close()
+            defaultPool = WorkerPool(threadCount)
+        return defaultPool
+
+# The line cache that assembleMany shares among files, as files that are
+# assembled together tend to have many lines in common.
+sharedLineCache = LineCache.LineCache()
+
+def assembleMany(paths, mode = "coff", jobs = None):
+    """ Assembles the files at the given paths on a pool of `jobs` persistent
+    worker threads (the default is the number of processors), and returns a
+    list of AssemblyResult objects, in the same order as the paths. Every file
+    is assembled on its own, and written next to its source file in the "coff"
+    and "com" modes. The "code" mode returns the bytecode instead. `jobs` must
+    be at least 1. """
+    if mode not in outputExtensions:
+        raise ValueError("unknown output mode '%s'" % mode)
+
+    # Make sure that the lexer is compiled or loaded once, up front.
+    Lexer.getLexerDFA()
+
+    pool = getDefaultPool(jobs)
+    return pool.map(lambda path: assembleFile(path, mode, sharedLineCache), paths)
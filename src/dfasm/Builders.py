@@ -133,6 +133,67 @@ builders["setng"] = defineSetCCInstruction("setng", 0x9e)
 builders["setg"]  = defineSetCCInstruction("setg",  0x9f)
 builders["setnl"] = defineSetCCInstruction("setnl", 0x9f)
 
+############################################################
+### Shortest encoding selection
+############################################################
+
+class MeasuringAssembler(object):
+    """ Stands in for an assembler, and counts the bytes that an instruction
+    builder writes instead of writing them. Everything else is forwarded to
+    the actual assembler. """
+    def __init__(self, asm):
+        self.asm = asm
+        self.size = 0
+
+    @property
+    def index(self):
+        return self.asm.index + self.size
+
+    def write(self, bytes):
+        self.size += len(bytes)
+
+    def writeArgument(self, arg):
+        self.size += arg.dataSize
+
+    def __getattr__(self, name):
+        return getattr(self.asm, name)
+
+def measureInstruction(instructionBuilder, asm, args):
+    """ Gets the number of bytes that the given instruction builder would write
+    for the given arguments, or None if the arguments are not valid for it. """
+    measure = MeasuringAssembler(asm)
+    try:
+        instructionBuilder(measure, list(args))
+    except ValueError:
+        return None
+    return measure.size
+
+def writeShortestInstruction(name, instructionBuilders, asm, args):
+    # The first builder is the general form of the instruction, the others are
+    # alternative forms that are only valid for some operands. Most operands
+    # have no valid alternative form, so the general form is not measured
+    # unless there is one.
+    sizes = [(measureInstruction(builder, asm, args), builder)
+             for builder in instructionBuilders[1:]]
+    sizes = [(size, builder) for size, builder in sizes if size is not None]
+    if not sizes:
+        return instructionBuilders[0](asm, args)
+
+    generalSize = measureInstruction(instructionBuilders[0], asm, args)
+    size, builder = min(sizes, key=lambda item: item[0])
+    if generalSize is not None and generalSize <= size:
+        return instructionBuilders[0](asm, args)
+
+    if generalSize is not None:
+        asm.recordSavedBytes(name, generalSize - size)
+    return builder(asm, args)
+
+def defineShortestInstruction(name, *instructionBuilders):
+    """ Defines an instruction that is written in the shortest of the given
+    forms that is valid for its operands. The first form is the general one,
+    and wins ties. """
+    return lambda asm, args: writeShortestInstruction(name, instructionBuilders, asm, args)
+
 ############################################################
 ### Binary instructions
 ############################################################
@@ -203,7 +264,49 @@ def writeBinaryImmediateInstruction(name, opCode, asm, args):
 def defineBinaryImmediateInstruction(name, opCode):
     return lambda asm, args: writeBinaryImmediateInstruction(name, opCode, asm, args)
 
-builders["xchg"]  = defineBinaryInstruction("xchg", 0x21, True, False)
+def writeAccumulatorImmediateInstruction(name, opCode, asm, args):
+    if len(args) != 2:
+        raise ValueError("'%s' takes precisely two arguments." % name)
+
+    regArg, immArg = args
+    if isImmediate(regArg):
+        raise ValueError("The first argument to '%s' may not be an immediate value." % name)
+    if regArg.addressingMode != "register" or regArg.operandIndex != 0 \
+            or regArg.operandSize not in (size8, size32) or not isImmediate(immArg):
+        raise ValueError("'%s' only has an accumulator form for AL or EAX "
+                         "and an immediate value." % name)
+
+    wordReg = regArg.operandSize > size8
+    if immArg.operandSize > size8 and not wordReg:
+        raise ValueError("Cannot use immediate larger than 8 bits (%s) "
+                         "with 8-bit register %s" % (immArg, regArg))
+
+    asm.write([opCode << 3 | 0x04 | int(wordReg) & 0x01])
+    asm.writeArgument(immArg.cast(regArg.operandSize))
+
+def defineAccumulatorImmediateInstruction(name, opCode):
+    return lambda asm, args: writeAccumulatorImmediateInstruction(name, opCode, asm, args)
+
+def writeExchangeAccumulatorInstruction(asm, args):
+    if len(args) != 2:
+        raise ValueError("'xchg' takes precisely two arguments.")
+    if any(isImmediate(arg) for arg in args):
+        raise ValueError("'xchg' may not take an immediate value.")
+
+    otherArgs = [arg for arg in args if arg.addressingMode != "register"
+                 or arg.operandSize != size32 or arg.operandIndex != 0]
+    # 'xchg eax, eax' is not encoded as 0x90, because that is a 'nop' in
+    # 64-bit mode, which does not clear the upper half of rax.
+    if len(otherArgs) != 1 or otherArgs[0].addressingMode != "register" \
+            or otherArgs[0].operandSize != size32:
+        raise ValueError("'xchg' only has an accumulator form for EAX and "
+                         "another 32-bit register.")
+
+    asm.write([0x90 | otherArgs[0].operandIndex])
+
+builders["xchg"]  = defineShortestInstruction("xchg",
+                        defineBinaryInstruction("xchg", 0x21, True, False),
+                        writeExchangeAccumulatorInstruction)
 builders["movsx"] = defineExtendedBinaryInstruction("movsx", 0x0f, 0x2f, False)
 builders["movzx"] = defineExtendedBinaryInstruction("movzx", 0x0f, 0x2d, False)
 
@@ -233,7 +336,8 @@ def defineAmbiguousBinaryInstruction(name, immOpCode, opCode = None):
         opCode = immOpCode << 1
     binDef = defineBinaryInstruction(name, opCode)
     immDef = defineBinaryImmediateInstruction(name, immOpCode)
-    return defineAmbiguousInstruction(binDef, immDef)
+    accDef = defineAccumulatorImmediateInstruction(name, immOpCode)
+    return defineShortestInstruction(name, defineAmbiguousInstruction(binDef, immDef), accDef)
 
 builders["add"]   = defineAmbiguousBinaryInstruction("add", 0x00)
 builders["or"]    = defineAmbiguousBinaryInstruction("or",  0x01)
@@ -288,7 +392,16 @@ builders["shr"]   = defineShiftInstruction("shr", 5)
 ############################################################
 
 def makeRelativeSymbolOperand(asm, shortOffset, longOffset, arg):
-    if arg.makeRelative(shortOffset).operandSize <= size8:
+    if isinstance(arg, Instructions.LabelOperandBase):
+        # Branches to labels start out short, and are grown by the
+        # assembler's relaxation pass if their target turns out to be
+        # out of range.
+        if asm.isLongBranch():
+            return arg.makeSymbol(asm, asm.index).makeRelative(longOffset).cast(size32)
+        relOp = arg.makeSymbol(asm, asm.index).makeRelative(shortOffset).cast(size8)
+        asm.addShortBranch(relOp)
+        return relOp
+    elif arg.makeRelative(shortOffset).operandSize <= size8:
         return arg.makeSymbol(asm, asm.index).makeRelative(shortOffset).cast(size8)
     else:
         return arg.makeSymbol(asm, asm.index).makeRelative(longOffset).cast(size32)
@@ -464,9 +577,38 @@ def writeTestImmediateInstruction(asm, args):
         asm.write([createModRM(memArg.addressingMode, 0, memArg.operandIndex)])
         asm.writeArgument(immArg.cast(memArg.operandSize))
 
-builders["test"]  = defineAmbiguousInstruction(
-                        defineBinaryInstruction("test", 0x21, True, True),
-                        writeTestImmediateInstruction)
+byteRegisters = dict((Instructions.registers[name].index, Instructions.registerOperands[name])
+                     for name in ("al", "cl", "dl", "bl"))
+
+def writeTestByteImmediateInstruction(asm, args):
+    if len(args) != 2:
+        raise ValueError("'test' takes precisely two operands.")
+
+    immArg, memArg = args
+    if isImmediate(memArg):
+        immArg, memArg = memArg, immArg
+
+    # Testing a dword against an immediate in the [0, 0x7f] range only ever
+    # affects its low byte, and sets the same flags as testing that byte.
+    if not isinstance(immArg, Instructions.ImmediateOperand) or not 0 <= immArg.value <= 0x7f \
+            or isImmediate(memArg) or memArg.operandSize != size32:
+        raise ValueError("'test' only has a byte form for dword operands and "
+                         "immediates in the [0, 0x7f] range.")
+
+    if memArg.addressingMode == "register":
+        if memArg.operandIndex not in byteRegisters:
+            raise ValueError("'%s' has no low byte register." % memArg)
+        memArg = byteRegisters[memArg.operandIndex]
+    else:
+        memArg = memArg.cast(size8)
+
+    writeTestImmediateInstruction(asm, [memArg, immArg])
+
+builders["test"]  = defineShortestInstruction("test",
+                        defineAmbiguousInstruction(
+                            defineBinaryInstruction("test", 0x21, True, True),
+                            writeTestImmediateInstruction),
+                        writeTestByteImmediateInstruction)
 
 ############################################################
 ### Enter (= build stack frame) instruction
@@ -585,3 +727,18 @@ builders["imul"] = defineAmbiguousArgumentCountInstruction("imul", {
                            defineThreeOpImmediateInstruction("imul", 0x6b >> 2)),
                      3 : defineThreeOpImmediateInstruction("imul", 0x6b >> 2),
                    })
+
+############################################################
+### Template mnemonics
+############################################################
+
+# The mnemonics whose encoding only depends on the registers, addressing modes
+# and operand sizes of their operands, and not on the values of their
+# immediates and displacements. Those values are only ever written as they
+# are. Instructions with these mnemonics are encoded once per shape of their
+# operands, and are copied from a template after that (see Templates.py).
+# Jumps, shifts, 'test', 'int', 'enter' and 'ret' do not qualify.
+templateMnemonics = set(["not", "neg", "inc", "dec", "mul", "div", "idiv",
+                         "xchg", "movsx", "movzx", "lea", "push", "pop", "mov", "imul",
+                         "add", "or", "adc", "sbb", "and", "sub", "xor", "cmp"])
+templateMnemonics.update(name for name in builders if name.startswith("set"))
@@ -1,4 +1,4 @@
-import functools
+import struct
 
 def to8(x):
     """ Convert a given integer to a single-byte list. """
@@ -18,17 +18,31 @@ def to32le(x):
             (x >> 16) & 0xff,
             (x >> 24) & 0xff]
 
+# struct format characters for unsigned integers, by size in bytes.
+unsignedFormats = { 1 : "B", 2 : "H", 4 : "I" }
+
+def packUnsigned(size, values):
+    """ Packs a list of unsigned integers, each of which must fit in `size`
+    bytes, into a single little endian bytearray. """
+    return bytearray(struct.pack("<%d%s" % (len(values), unsignedFormats[size]), *values))
+
 def relative(enc, here):
     """ Given an address encoding function and an offset, return a new
     function that encodes addresses relative to the given offset."""
     return lambda x: enc(x - here)
 
-@functools.total_ordering
-class OperandSize(object):
-    """ Represents an operand's size. """
-    def __init__(self, size, encoding):
-        self.size = size
-        self.encoding = encoding
+class OperandSize(int):
+    """ Represents an operand's size. Operand sizes are integers that count
+    bytes, so they can be compared to one another directly. """
+    def __new__(cls, size, encoding):
+        result = int.__new__(cls, size)
+        result.encoding = encoding
+        return result
+
+    @property
+    def size(self):
+        """ Gets the number of bytes in an operand of this size. """
+        return int(self)
 
     def __str__(self):
         return str(self.size)
@@ -36,12 +50,6 @@ class OperandSize(object):
     def __repr__(self):
         return "OperandSize(%r, %r)" % (self.size, self.encoding)
 
-    def __gt__(self, other):
-        return self.size > other.size
-
-    def __eq__(self, other):
-        return self.size == other.size
-
 # size0 represents zero, which can usually be omitted. If not, it will
 # probably be upcast somehow.
 size0 = OperandSize(0, lambda x: [])
@@ -0,0 +1,147 @@
+import Lexer
+import Assembler
+import libdiagnostics
+from Parser import TokenStream, parseAllInstructions
+from libdiagnostics import DiagnosticsException
+
+class DiagnosticsList(object):
+    """ A log that collects diagnostics in a list, instead of printing them. """
+    def __init__(self):
+        self.entries = []
+
+    def LogError(self, *args):
+        self.entries.append(args[0] if len(args) == 1 else libdiagnostics.LogEntry(*args))
+
+    def LogWarning(self, *args):
+        self.LogError(*args)
+
+class SourceLine(object):
+    """ A single line of an incrementally parsed document, along with its
+    tokens, syntax nodes and diagnostics. Comments and string literals never
+    span more than one line, so every line starts in the lexer's initial state,
+    and can be lexed and parsed independently of the lines around it. """
+
+    def __init__(self, text, name):
+        """ Lexes and parses the given line of text. `name` is used to identify
+        the line's source document in diagnostics. """
+        self.text = text
+        self.doc = libdiagnostics.SourceDocument(text, name)
+        self.log = DiagnosticsList()
+        try:
+            self.tokens = Lexer.lex(self.doc, Lexer.getLexerDFA())
+        except DiagnosticsException as ex:
+            self.log.LogError(ex.Entry)
+            self.tokens = []
+        try:
+            self.nodes = parseAllInstructions(TokenStream(self.tokens, self.doc, self.log))
+        except ValueError as ex:
+            # Lines that are still being typed, such as a bare '.', can be
+            # rejected by the parser outright.
+            self.log.LogError('Invalid', str(ex), self.location)
+            self.nodes = []
+        except DiagnosticsException as ex:
+            self.log.LogError(ex.Entry)
+            self.nodes = []
+
+    @property
+    def diagnostics(self):
+        """ Gets the list of diagnostics that were produced while lexing and
+        parsing this line. """
+        return self.log.entries
+
+    @property
+    def location(self):
+        """ Gets a source location that spans this entire line. """
+        return libdiagnostics.SourceLocation(self.doc, 0, self.doc.CharacterCount)
+
+    def __repr__(self):
+        return "SourceLine(%r)" % self.text
+
+class IncrementalDocument(object):
+    """ A document that is re-lexed and re-parsed incrementally: when a range of
+    lines is edited, only the new lines are lexed and parsed, and the
+    SourceLine objects (and thus the tokens and syntax nodes) of all other
+    lines are reused. """
+
+    def __init__(self, text = "", name = "document"):
+        self.name = name
+        self.lines = []
+        self.setText(text)
+
+    def createLine(self, text):
+        """ Lexes and parses a single line of text. Lines are identified by
+        their index in `lines` rather than by their source document, because
+        that index changes when lines are inserted or removed above them. """
+        return SourceLine(text, self.name)
+
+    def replaceLines(self, start, end, newLines):
+        """ Replaces the lines in the [start, end) range by the given list of
+        new lines of text, which should include their line terminators. Only
+        the new lines are lexed and parsed. The new SourceLine objects are
+        returned. """
+        replacement = [self.createLine(text) for text in newLines]
+        self.lines[start:end] = replacement
+        return replacement
+
+    def insertLines(self, index, newLines):
+        """ Inserts the given lines of text before the line with the given
+        index. """
+        return self.replaceLines(index, index, newLines)
+
+    def removeLines(self, start, end):
+        """ Removes the lines in the [start, end) range. """
+        self.replaceLines(start, end, [])
+
+    def setText(self, text):
+        """ Sets this document's text. Lines at the start and end of the
+        document that have not changed are kept as they are, and only the lines
+        in between are lexed and parsed again. The new SourceLine objects are
+        returned. """
+        newLines = text.splitlines(True)
+
+        prefix = 0
+        maxPrefix = min(len(newLines), len(self.lines))
+        while prefix < maxPrefix and self.lines[prefix].text == newLines[prefix]:
+            prefix += 1
+
+        suffix = 0
+        maxSuffix = maxPrefix - prefix
+        while suffix < maxSuffix and self.lines[-1 - suffix].text == newLines[-1 - suffix]:
+            suffix += 1
+
+        return self.replaceLines(prefix, len(self.lines) - suffix,
+                                 newLines[prefix:len(newLines) - suffix])
+
+    @property
+    def text(self):
+        """ Gets this document's text. """
+        return "".join(line.text for line in self.lines)
+
+    @property
+    def nodes(self):
+        """ Gets a list of all syntax nodes in this document. """
+        return [node for line in self.lines for node in line.nodes]
+
+    @property
+    def diagnostics(self):
+        """ Gets a list of all lexer and parser diagnostics in this document, as
+        (zero-based line index, log entry) pairs. """
+        return [(i, entry) for i, line in enumerate(self.lines) for entry in line.diagnostics]
+
+    def assemble(self, asm = None):
+        """ Assembles this document's syntax nodes. Encoding is not incremental,
+        as an edit can move every label that follows it. The assembler is
+        returned, along with a list of all diagnostics, as (zero-based line
+        index, log entry) pairs. """
+        if asm is None:
+            asm = Assembler.Assembler()
+        diagnostics = self.diagnostics
+        for i, line in enumerate(self.lines):
+            for node in line.nodes:
+                try:
+                    asm.process(node)
+                except ValueError as ex:
+                    diagnostics.append((i, libdiagnostics.LogEntry('Invalid', str(ex), line.location)))
+                except DiagnosticsException as ex:
+                    diagnostics.append((i, ex.Entry))
+        return asm, diagnostics
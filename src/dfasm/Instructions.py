@@ -3,6 +3,8 @@ import Symbols
 
 class Register(object):
     """ Represents a processor register. """
+    __slots__ = ('name', 'index', 'size', 'isSegmentRegister')
+
     def __init__(self, name, index, size, isSegmentRegister):
         self.name = name
         self.index = index
@@ -56,7 +58,9 @@ registers = {
 }
 
 class Operand(object):
-    """ Defines a base class for instruction operands. """
+    """ Defines a base class for instruction operands. Operands define
+    `__slots__`, as large inputs create a great many of them. """
+    __slots__ = ()
 
     def writeDataTo(self, asm):
         """ Writes operand data not in the opcode itself to the assembler. """
@@ -67,13 +71,22 @@ class Operand(object):
         now (True) or must be deferred (False). """
         raise NotImplementedError
 
+    @property
+    def symbolName(self):
+        """ Gets the name of the symbol that this operand refers to, or None if
+        it does not refer to a symbol. """
+        return None
+
     def cast(self):
         """ "Casts" this operand to match the given size, by casting its
         subexpressions. """
         raise NotImplementedError
 
 class RegisterOperand(Operand):
-    """ Defines a register operand. """
+    """ Defines a register operand. Register operands are immutable, so the
+    ones in `registerOperands` can be shared. """
+    __slots__ = ('register',)
+
     def __init__(self, register):
         self.register = register
 
@@ -109,10 +122,14 @@ class RegisterOperand(Operand):
     def __repr__(self):
         return "RegisterOperand(%r)" % self.register
 
+# A dictionary that maps register names to shared register operands.
+registerOperands = dict((name, RegisterOperand(register)) for name, register in registers.items())
+
 class BinaryOperand(Operand):
     """ Represents a binary pseudo-operand. The x86 ISA does not support these
     operands; they are to be used solely for the assembler's intermediate
     representation. """
+    __slots__ = ('left', 'op', 'right')
 
     def __init__(self, left, op, right):
         self.left = left
@@ -133,16 +150,23 @@ class BinaryOperand(Operand):
 
 class ImmediateOperandBase(Operand):
     """ A base class for immediate and label operands. """
-    pass
+    __slots__ = ()
 
 class SymbolOperand(Operand):
     """ A type for operands that refer to a symbol. """
+    __slots__ = ('symbol', 'operandSize', 'offset', 'relativeOffset')
+
     def __init__(self, symbol, operandSize, offset, relativeOffset = None):
         self.symbol = symbol
         self.operandSize = operandSize
         self.offset = offset
         self.relativeOffset = relativeOffset
 
+    @property
+    def symbolName(self):
+        """ Gets the name of the symbol that this operand refers to. """
+        return self.symbol.name
+
     @property
     def isRelative(self):
         """ Checks if this symbol operand is relative. """
@@ -190,7 +214,10 @@ class SymbolOperand(Operand):
         return "SymbolOperand(%r, %r, %r, %r)" % (self.symbol, self.operandSize, self.offset, self.relativeOffset)
 
 class ImmediateOperand(ImmediateOperandBase):
-    """ Represents an immediate operand. """
+    """ Represents an immediate operand. Immediate operands are immutable, so
+    small ones are shared. """
+    __slots__ = ('value', 'operandSize')
+
     def __init__(self, value, operandSize):
         self.value = value
         self.operandSize = operandSize
@@ -207,6 +234,8 @@ class ImmediateOperand(ImmediateOperandBase):
         return True
 
     def cast(self, size):
+        if size == self.operandSize:
+            return self
         return ImmediateOperand(self.value, size)
 
     def toUnsigned(self):
@@ -218,10 +247,8 @@ class ImmediateOperand(ImmediateOperandBase):
 
     @staticmethod
     def createSigned(value):
-        if value == 0:
-            return ImmediateOperand(0, size0)
-        elif -128 <= value <= 127:
-            return ImmediateOperand(value, size8)
+        if -128 <= value <= 127:
+            return signedImmediates[value + 128]
         elif -2 ** 15 <= value <= 2 ** 15 - 1:
             return ImmediateOperand(value, size16)
         else:
@@ -229,10 +256,8 @@ class ImmediateOperand(ImmediateOperandBase):
 
     @staticmethod
     def createUnsigned(value):
-        if value == 0:
-            return ImmediateOperand(0, size0)
-        elif 0 < value <= 255:
-            return ImmediateOperand(value, size8)
+        if 0 <= value <= 255:
+            return unsignedImmediates[value]
         elif 0 <= value <= 2 ** 16 - 1:
             return ImmediateOperand(value, size16)
         else:
@@ -244,8 +269,18 @@ class ImmediateOperand(ImmediateOperandBase):
     def __repr__(self):
         return "ImmediateOperand(%r, %r)" % (self.value, self.operandSize)
 
+# The immediate operands that ImmediateOperand.createSigned returns for values
+# in the [-128, 127] range, and that createUnsigned returns for values in the
+# [0, 255] range.
+signedImmediates = [ImmediateOperand(value, size8 if value != 0 else size0)
+                    for value in range(-128, 128)]
+unsignedImmediates = [ImmediateOperand(value, size8 if value != 0 else size0)
+                      for value in range(0, 256)]
+
 class LabelOperandBase(ImmediateOperandBase):
     """ A base class for label operands. """
+    __slots__ = ('labelName', 'operandSize', 'placementIndex')
+
     def __init__(self, labelName, operandSize):
         self.labelName = labelName
         self.operandSize = operandSize
@@ -259,6 +294,11 @@ class LabelOperandBase(ImmediateOperandBase):
     def canWrite(self, asm):
         return self.createOperand(asm).canWrite(asm)
 
+    @property
+    def symbolName(self):
+        """ Gets the name of the label that this operand refers to. """
+        return self.labelName
+
     def makeRelative(self, offset):
         """ Turns this label operand into a relative operand. """
         return RelativeLabelOperand(offset, self.labelName, self.operandSize)
@@ -280,10 +320,13 @@ class LabelOperandBase(ImmediateOperandBase):
 
 class RelativeLabelOperand(LabelOperandBase):
     """ Describes a relative label operand. """
+    __slots__ = ('offset',)
+
     def __init__(self, offset, labelName, operandSize):
         self.offset = offset
         self.labelName = labelName
         self.operandSize = operandSize
+        self.placementIndex = None
 
     def makeSymbol(self, asm, offset):
         return SymbolOperand(asm.getSymbol(self.labelName), self.operandSize, offset, self.offset)
@@ -296,6 +339,8 @@ class RelativeLabelOperand(LabelOperandBase):
 
 class LabelOperand(LabelOperandBase):
     """ Describes an absolute label operand. """
+    __slots__ = ()
+
     def cast(self, size):
         return LabelOperand(self.labelName, size)
 
@@ -307,17 +352,27 @@ class LabelOperand(LabelOperandBase):
 
 class MemoryOperand(Operand):
     """ Represents a simple memory operand. """
+    __slots__ = ('addressRegister', 'displacement', 'operandSize')
+
     def __init__(self, addressRegister, displacement, operandSize):
         self.addressRegister = addressRegister
         self.displacement = displacement
         self.operandSize = operandSize
 
     def cast(self, size):
+        if size == self.operandSize:
+            return self
         return MemoryOperand(self.addressRegister, self.displacement, size)
 
     def canWrite(self, asm):
         return self.displacement.canWrite(asm)
 
+    @property
+    def symbolName(self):
+        """ Gets the name of the symbol that this operand's displacement refers
+        to, if any. """
+        return self.displacement.symbolName
+
     def isBasePointerPlusZero(self):
         """ Returns True if this memory operand is either [ebp] or [bp]. """
         # [ebp] does not exist; its slot is taken by [disp32].
@@ -369,6 +424,7 @@ class SIBMemoryOperand(Operand):
     """ Represents an SIB memory operand. """
     # Encoding from:
     # http://www.c-jump.com/CIS77/CPU/x86/lecture.html#X77_0100_sib_byte_layout
+    __slots__ = ('baseRegister', 'indexRegister', 'indexShift', 'displacement', 'operandSize')
 
     def __init__(self, baseRegister, indexRegister, indexShift, displacement, operandSize):
         self.baseRegister = baseRegister
@@ -380,7 +436,15 @@ class SIBMemoryOperand(Operand):
     def canWrite(self, asm):
         return self.displacement.canWrite(asm)
 
+    @property
+    def symbolName(self):
+        """ Gets the name of the symbol that this operand's displacement refers
+        to, if any. """
+        return self.displacement.symbolName
+
     def cast(self, size):
+        if size == self.operandSize:
+            return self
         return SIBMemoryOperand(self.baseRegister, self.indexRegister, self.indexShift, self.displacement, size)
 
     @property
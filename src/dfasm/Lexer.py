@@ -1,20 +1,86 @@
+import os
+import json
+import array
+import hashlib
+import System
 import Automata
 import libdiagnostics
+from collections import OrderedDict
 from libdiagnostics import DiagnosticsException
 
+# The types of trivia tokens, which are ignored by the parser. Newlines are
+# only trivia when every line is parsed separately; otherwise, they terminate
+# instructions.
+triviaTypes = frozenset(['whitespace', 'comment', 'newline'])
+lineTriviaTypes = frozenset(['whitespace', 'comment'])
+
 class Token(object):
-    """ A token of a certain type, at the given location in the file. """
-    def __init__(self, contents, type, location):
+    """ A token of a certain type, at the given location in the file. Tokens
+    created by the lexer store their offset in their source document, and
+    only create a SourceLocation object when their location is requested. """
+    __slots__ = ('contents', 'type', 'doc', 'start', 'locationValue')
+
+    def __init__(self, contents, type, location = None, doc = None, start = None):
         """ `contents` is the string represented by this token, and `type` is
         its type as a string; a key in `asmRegexes`. `location` is a
         SourceLocation object specifying the location of the token in the
-        source code. """
+        source code. Alternatively, `doc` and `start` can be given, and the
+        location will be created on demand. """
         self.contents = contents
         self.type = type
-        self.location = location
+        self.doc = doc
+        self.start = start
+        self.locationValue = location
+
+    @property
+    def location(self):
+        """ Gets this token's location in the source code. """
+        if self.locationValue is None:
+            self.locationValue = libdiagnostics.SourceLocation(self.doc, self.start, len(self.contents))
+        return self.locationValue
+
+    def isTrivia(self):
+        return self.type in triviaTypes
+
+    def __str__(self):
+        return self.contents
+
+    def __repr__(self):
+        return 'Token(%r, %r, %r)' % (self.contents, self.type, self.location)
+
+class TokenView(object):
+    """ A view of a single token in a TokenStore. Views behave like Token
+    objects, but only store a reference to their store and an index. """
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def contents(self):
+        start = self.store.starts[self.index]
+        return self.store.text[start:start + self.store.lengths[self.index]]
+
+    @property
+    def type(self):
+        return storeTokenTypes[self.store.types[self.index]]
+
+    @property
+    def doc(self):
+        return self.store.doc
+
+    @property
+    def start(self):
+        return self.store.starts[self.index]
+
+    @property
+    def location(self):
+        """ Creates this token's location in the source code. """
+        return libdiagnostics.SourceLocation(self.store.doc, self.start, self.store.lengths[self.index])
 
     def isTrivia(self):
-        return self.type in ('whitespace', 'comment', 'newline')
+        return self.type in triviaTypes
 
     def __str__(self):
         return self.contents
@@ -22,16 +88,49 @@ class Token(object):
     def __repr__(self):
         return 'Token(%r, %r, %r)' % (self.contents, self.type, self.location)
 
+class TokenStore(object):
+    """ A compact list of tokens in a single source document. Tokens are stored
+    as parallel arrays of type ids (indices in `storeTokenTypes`), start
+    offsets and lengths. Indexing or iterating over a token store produces
+    TokenView objects. """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.text = doc.Source
+        self.types = array.array('B')
+        self.starts = array.array('i')
+        self.lengths = array.array('i')
+
+    def append(self, type, start, length):
+        """ Appends a token with the given type name, start offset and length
+        to this token store. """
+        self.types.append(storeTokenTypeIds[type])
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError("token index out of range")
+        return TokenView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self.types)):
+            yield TokenView(self, i)
+
+    def __repr__(self):
+        return repr(list(self))
+
 def longestSubstring(text, startIndex, regex):
-    state = regex.GetInitialState()
-    i = startIndex
-    endIndex = -1
-    while i < len(text):
-        state = state.AddInput(text[i])
-        if state.Accepts():
-            endIndex = i
-        i += 1
-    return endIndex + 1
+    """ Finds the end index of the longest substring of the given text that
+    starts at the given index and is accepted by the given DFA handle, or zero
+    if there is no such substring. The scan runs entirely on the managed side,
+    and stops as soon as the DFA enters a dead state. """
+    return max(regex.LongestMatch(text, startIndex), 0)
 
 def processChar(text):
     if text.isalpha():
@@ -41,38 +140,61 @@ def processChar(text):
     else:
         return text
 
+# Translation tables that map every Latin-1 character to the character it is
+# turned into by processChar. Byte strings are translated with a 256-character
+# table, and unicode strings, which is what IronPython uses for all strings,
+# with a dictionary of the characters that actually change.
+characterClassTable = "".join(processChar(chr(i)) for i in range(256))
+unicodeCharacterClassTable = dict((i, ord(processChar(unichr(i))))
+                                  for i in range(256) if processChar(unichr(i)) != unichr(i))
+
 def processText(text):
-    return map(processChar, text)
-
-# A dictionary containing the regex for each type of token. Before strings are
-# compared to these regexes, alphabet characters [a-zA-Z] are turned into 'c's
-# and digits [0-9] are turned into 'n's (by processText): this significantly
-# simplifies the expressions, and speeds up matching on them.
-
-asmRegexes = {
-    "identifier": "(_+c)(_+c+n)*",
-    "integer"   : "n*",
-    "whitespace": "( +\r+\t)*",
-    "newline"   : "\n*",
-    "lparen"    : "\\(",
-    "rparen"    : "\\)",
-    "lbracket"  : "[",
-    "rbracket"  : "]",
-    "comma"     : ",",
-    "plus"      : "\\+",
-    "minus"     : "-",
-    "asterisk"  : "\\*",
-    "slash"     : "/",
-    "percent"   : "%",
-    "ampersand" : "&",
-    "bar"       : "|",
-    "rshift"    : ">>",
-    "lshift"    : "<<",
-    "dot"       : ".",
-    "colon"     : ":",
-    "semicolon" : ";",
-    "quote"     : '"',
-}
+    """ Turns alphabet characters into 'c's and digits into 'n's, in a single
+    pass over the text. """
+    if isinstance(text, unicode):
+        return text.translate(unicodeCharacterClassTable)
+    else:
+        return text.translate(characterClassTable)
+
+# An ordered dictionary containing the regex for each type of token. Before
+# strings are compared to these regexes, alphabet characters [a-zA-Z] are turned
+# into 'c's and digits [0-9] are turned into 'n's (by processText): this
+# significantly simplifies the expressions, and speeds up matching on them.
+# When two regexes match equally long prefixes, the one that comes first in this
+# dictionary wins.
+
+asmRegexes = OrderedDict([
+    ("identifier", "(_+c)(_+c+n)*"),
+    ("integer",    "n*"),
+    ("whitespace", "( +\r+\t)*"),
+    ("newline",    "\n*"),
+    ("lparen",     "\\("),
+    ("rparen",     "\\)"),
+    ("lbracket",   "["),
+    ("rbracket",   "]"),
+    ("comma",      ","),
+    ("plus",       "\\+"),
+    ("minus",      "-"),
+    ("asterisk",   "\\*"),
+    ("slash",      "/"),
+    ("percent",    "%"),
+    ("ampersand",  "&"),
+    ("bar",        "|"),
+    ("rshift",     ">>"),
+    ("lshift",     "<<"),
+    ("dot",        "."),
+    ("colon",      ":"),
+    ("semicolon",  ";"),
+    ("quote",      '"'),
+])
+
+# The token types in `asmRegexes`, indexed by the tags in the lexer's DFA.
+tokenTypes = list(asmRegexes.keys())
+
+# All token types that the lexer can produce, indexed by the type ids that are
+# used in TokenStore objects.
+storeTokenTypes = tokenTypes + ["comment", "string", "undefined"]
+storeTokenTypeIds = dict((type, i) for i, type in enumerate(storeTokenTypes))
 
 def makeDFA(regex):
     """ Compile the given regex to a deterministic finite-state automaton. """
@@ -80,95 +202,158 @@ def makeDFA(regex):
     dfa = compiled.Optimize()
     return dfa
 
-compiledRegexes = {type: makeDFA(regex) for type, regex in asmRegexes.items()}
+def makeLexerDFA(regexes):
+    """ Compile the given ordered dictionary of token regexes to a single tagged
+    deterministic finite-state automaton. Every accepting state of that
+    automaton is tagged with the index of its token type in the dictionary. """
+    regexArray = System.Array[System.String](regexes.values())
+    return Automata.Interop.Instance.CompileTaggedRegexes(regexArray)
+
+# The version of the lexer cache file format. Bump this whenever said format, or
+# the way the lexer's DFA is constructed, changes.
+lexerCacheVersion = 1
+
+# The path of the lexer cache file, which stores the lexer's DFA as a set of
+# dense tables. Compiling the token regexes is a fixed cost that dominates
+# short inputs, so the cached tables are loaded instead, whenever possible.
+lexerCachePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexer.cache")
+
+# Tells if the lexer cache should be used. Set this to False before lexing
+# anything to bypass the cache.
+useLexerCache = True
+
+def getRegexesKey(regexes):
+    """ Computes a hash of the given ordered dictionary of token regexes, which
+    is used to detect stale lexer caches. """
+    return hashlib.sha1(json.dumps(list(regexes.items()))).hexdigest()
 
-def getBestMatch(text, startIndex, grammar):
-    result = "undefined"
-    longest = -1
-    for type, dfa in grammar.items():
-        match = longestSubstring(text, startIndex, dfa)
-        if match > longest:
-            result = type
-            longest = match
+def saveLexerDFA(path, regexes, dfa):
+    """ Writes the given tagged DFA's dense tables to a cache file. Failing to
+    write the cache is not an error. """
+    contents = {
+        "version"    : lexerCacheVersion,
+        "key"        : getRegexesKey(regexes),
+        "start"      : dfa.Automaton.StartState,
+        "characters" : "".join(dfa.ClassCharacters),
+        "transitions": list(dfa.TransitionTable),
+        "accepting"  : list(dfa.AcceptingTable),
+        "tags"       : list(dfa.StateTags),
+    }
+    # Write to a temporary file first, and then move it into place, so
+    # concurrent dfasm processes never observe a partially written cache.
+    tempPath = "%s.%d" % (path, os.getpid())
+    try:
+        with open(tempPath, "w") as f:
+            json.dump(contents, f)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(tempPath, path)
+    except (IOError, OSError):
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
 
-    if longest <= 0:
+def loadLexerDFA(path, regexes):
+    """ Reads a tagged DFA from the given cache file. None is returned if the
+    cache file does not exist, is malformed, or was created for another
+    version of the cache or another set of regexes. """
+    try:
+        with open(path, "r") as f:
+            contents = json.load(f)
+        if contents["version"] != lexerCacheVersion or contents["key"] != getRegexesKey(regexes):
+            return None
+        return Automata.Interop.Instance.LoadHandle(
+            contents["start"],
+            System.Array[System.Char](list(contents["characters"])),
+            System.Array[System.Int32](contents["transitions"]),
+            System.Array[System.Boolean](contents["accepting"]),
+            System.Array[System.Int32](contents["tags"]))
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        return None
+
+def getCachedLexerDFA(regexes, useCache = True):
+    """ Gets a tagged DFA for the given ordered dictionary of token regexes.
+    The DFA is loaded from the lexer cache if it is up to date, and compiled
+    from scratch (refreshing the cache) otherwise. """
+    if not useCache:
+        return makeLexerDFA(regexes)
+
+    dfa = loadLexerDFA(lexerCachePath, regexes)
+    if dfa is None:
+        dfa = makeLexerDFA(regexes)
+        saveLexerDFA(lexerCachePath, regexes, dfa)
+    return dfa
+
+# The lexer's tagged DFA. It is created on first use by getLexerDFA, so the
+# cache can still be bypassed after this module has been imported.
+compiledLexer = None
+
+def getLexerDFA():
+    """ Gets the lexer's tagged DFA for `asmRegexes`. """
+    global compiledLexer
+    if compiledLexer is None:
+        compiledLexer = getCachedLexerDFA(asmRegexes, useLexerCache)
+    return compiledLexer
+
+def getBestMatch(text, startIndex, dfa):
+    """ Finds the longest token that starts at the given index in a single pass
+    over the text, and returns its type and end index. """
+    match = dfa.LongestTaggedMatch(text, startIndex)
+
+    if match.End <= startIndex:
         # If we can't match at all, return a single-char "unrecognized" token.
         return "undefined", startIndex + 1
 
-    return result, longest
+    return tokenTypes[match.Tag], match.End
 
-def lex(doc, grammar):
-    """ Lex the given SourceDocument into tokens, using a dictionary that maps
-    maps token types (strings) to DFA objects. """
-    results = []
-    size = 0
-    text = doc.Source
+def scan(doc, dfa, start = 0, end = None):
+    """ Lazily scans the given SourceDocument for tokens, using a tagged DFA
+    whose tags are indices in `tokenTypes`, and yields (type, start, end)
+    triples. Offsets are relative to `start`. Comments and string literals are
+    recognized by the scanner itself: a semicolon starts a comment that runs
+    up to the next newline, and a quote starts a string literal that runs up
+    to the next quote on the same line. String literals are produced as a
+    single "string" token, quotes included. If `start` and `end` are given,
+    only that range of the document is scanned. """
+    text = doc.Source[start:end]
     processedText = processText(text)
-    while size < len(processedText):
-        type, newSize = getBestMatch(processedText, size, grammar)
-        location = libdiagnostics.SourceLocation(doc, size, newSize - size)
-        token = Token(text[size:newSize], type, location)
-        results.append(token)
+    size = 0
+    length = len(processedText)
+    while size < length:
+        type, newSize = getBestMatch(processedText, size, dfa)
+        if type == "semicolon":
+            newSize = text.find("\n", size)
+            if newSize < 0:
+                newSize = length
+            type = "comment"
+        elif type == "quote":
+            lineEnd = text.find("\n", newSize)
+            if lineEnd < 0:
+                lineEnd = length
+            closingIndex = text.find('"', newSize, lineEnd)
+            if closingIndex < 0:
+                location = libdiagnostics.SourceLocation(doc, start + size, newSize - size)
+                raise DiagnosticsException("Mismatched quotes",
+                                           "While scanning a string literal, a closing quote was not found.", location)
+            newSize = closingIndex + 1
+            type = "string"
+        yield type, size, newSize
         size = newSize
-    return results
-
-def joinTokens(tokens, type):
-    contents = "".join(t.contents for t in tokens)
-    location = tokens[0].location
-    for t in tokens[1:]:
-        location = location.Between(t.location)
-
-    return Token(contents, type, location)
-
-def processComments(tokens):
-    result = []
-    i = 0
-    while i < len(tokens):
-        if tokens[i].type == "semicolon":
-            commentTokens = []
-            while i < len(tokens) and tokens[i].type != "newline":
-                commentTokens.append(tokens[i])
-                i += 1
-            result.append(joinTokens(commentTokens, "comment"))
-        else:
-            result.append(tokens[i])
-            i += 1
-    return result
-
-def processStrings(tokens):
-    result = []
-    currentString = None
-    startLocation = None
-
-    for t in tokens:
-        if t.type == "quote":
-            if currentString is None:
-                # Open a new string, and begin collecting tokens into it.
-                currentString = []
-                startLocation = t.location
-            else:
-                # Close the string and push its ASCII values as comma-
-                # separated tokens: for example, `"abc"` will parse into the
-                # same list of tokens as `97,98,99`.
-                loc = startLocation.Between(t.location)
-                fullString = ''.join(currentString).decode('string_escape')
-                for i, c in enumerate(fullString):
-                    if i > 0:
-                        result.append(Token(',', 'comma', loc))
-                    result.append(Token(str(ord(c)), 'integer', loc))
-                currentString = None
-        elif currentString is not None:
-            currentString.append(t.contents)
-        else:
-            result.append(t)
-
-    if currentString is not None:
-        raise DiagnosticsException("Mismatched quotes",
-                                   "While scanning a string literal, a closing quote was not found.", startLocation)
-
-    return result
-
-process = lambda tokens: processComments(processStrings(tokens))
-
-lexAsm = lambda text: process(lex(text, compiledRegexes))
 
+def lexTokens(doc, dfa, start = 0, end = None):
+    """ Lazily lex the given SourceDocument into tokens, using a tagged DFA
+    whose tags are indices in `tokenTypes`. If `start` and `end` are given,
+    only that range of the document is lexed. The tokens' locations are only
+    created when they are needed. """
+    text = doc.Source[start:end]
+    for type, tokenStart, tokenEnd in scan(doc, dfa, start, end):
+        yield Token(text[tokenStart:tokenEnd], type, None, doc, start + tokenStart)
+
+def lex(doc, dfa):
+    """ Lex the given SourceDocument into a TokenStore, using a tagged DFA
+    whose tags are indices in `tokenTypes`. """
+    store = TokenStore(doc)
+    for type, tokenStart, tokenEnd in scan(doc, dfa):
+        store.append(type, tokenStart, tokenEnd - tokenStart)
+    return store
+
+lexAsm = lambda text: lexTokens(text, getLexerDFA())
@@ -0,0 +1,131 @@
+import Lexer
+import Parser
+import libdiagnostics
+import threading
+from collections import OrderedDict
+from libdiagnostics import DiagnosticsException
+
+class CountingLog(object):
+    """ A log that forwards diagnostics to another log, and counts them. """
+    def __init__(self, log):
+        self.log = log
+        self.count = 0
+
+    def LogError(self, *args):
+        self.count += 1
+        self.log.LogError(*args)
+
+    def LogWarning(self, *args):
+        self.count += 1
+        self.log.LogWarning(*args)
+
+def rebaseLocation(location, doc, delta):
+    """ Moves the given source location to the given document, and shifts it
+    by `delta` characters. """
+    return libdiagnostics.SourceLocation(doc, location.Position + delta, location.Length)
+
+def rebaseNode(value, doc, delta):
+    """ Copies the given syntax node, list of syntax nodes or token, and moves
+    the locations of all tokens in it to the given document, shifted by `delta`
+    characters. Syntax nodes (the classes in the Parser module) are copied
+    attribute by attribute; all other values, such as OperandSize objects, are
+    shared with the original. """
+    if isinstance(value, (Lexer.Token, Lexer.TokenView)):
+        if value.start is None:
+            return Lexer.Token(value.contents, value.type, rebaseLocation(value.location, doc, delta))
+        return Lexer.Token(value.contents, value.type, None, doc, value.start + delta)
+    elif isinstance(value, list):
+        return [rebaseNode(item, doc, delta) for item in value]
+    elif type(value).__module__ == Parser.__name__:
+        result = object.__new__(type(value))
+        for key, item in value.__dict__.items():
+            result.__dict__[key] = rebaseNode(item, doc, delta)
+        return result
+    else:
+        return value
+
+class LineCache(object):
+    """ A bounded, least-recently-used cache that maps lines of source code to
+    their syntax nodes. Lines are normalized by stripping leading and trailing
+    whitespace. When a line is found in the cache, its syntax nodes are copied,
+    and their tokens are re-based onto the line's actual location, so
+    diagnostics still point at the right place. A line cache can be shared by
+    several threads. """
+
+    def __init__(self, capacity = 4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, key):
+        """ Gets the cache entry for the given normalized line, and marks it as
+        the most recently used entry. None is returned if there is no such
+        entry. Hits and misses are counted. """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.entries[key] = entry
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def store(self, key, entry):
+        """ Adds an entry to the cache, and evicts the least recently used
+        entry if the cache is full. """
+        with self.lock:
+            self.entries[key] = entry
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(False)
+
+    def parseLine(self, doc, log, start, end):
+        """ Parses the line in the [start, end) range of the given document,
+        and returns its instructions as (node, TokenSpan) pairs. Lines that
+        produce diagnostics are not cached. """
+        text = doc.Source[start:end]
+        key = text.strip()
+        if not key:
+            return []
+        start += len(text) - len(text.lstrip())
+
+        entry = self.lookup(key)
+        if entry is not None:
+            nodes, entryStart = entry
+            delta = start - entryStart
+            return [(rebaseNode(node, doc, delta),
+                     Parser.TokenSpan(rebaseNode(span.first, doc, delta), rebaseNode(span.last, doc, delta)))
+                    for node, span in nodes]
+
+        countingLog = CountingLog(log)
+        tokens = Lexer.lexTokens(doc, Lexer.getLexerDFA(), start, start + len(key))
+        nodes = list(Parser.parseLocatedInstructions(Parser.TokenStream(tokens, doc, countingLog, True, end)))
+        if countingLog.count == 0:
+            self.store(key, (nodes, start))
+        return nodes
+
+    def parseDocument(self, doc, log, start = 0, end = None):
+        """ Lazily parses the given document, or the [start, end) range of it,
+        line by line, and yields its instructions as (node, TokenSpan) pairs.
+        Lexer errors are logged, and skip the line they occur on. """
+        text = doc.Source
+        if end is None:
+            end = len(text)
+        lineStart = start
+        while lineStart < end:
+            lineEnd = text.find("\n", lineStart, end)
+            if lineEnd < 0:
+                lineEnd = end
+            try:
+                for item in self.parseLine(doc, log, lineStart, lineEnd):
+                    yield item
+            except DiagnosticsException as ex:
+                log.LogError(ex.Entry)
+            lineStart = lineEnd + 1
+
+    def __str__(self):
+        total = self.hits + self.misses
+        hitRate = 100.0 * self.hits / total if total > 0 else 0.0
+        return "line cache: %d hits, %d misses (%.1f%% hit rate), %d of %d entries in use" \
+            % (self.hits, self.misses, hitRate, len(self.entries), self.capacity)
@@ -0,0 +1,109 @@
+import System
+import libcoff
+from Encoding import *
+
+def getCoffStorageClass(symbol):
+    if symbol.isExternal or symbol.isPublic:
+        return libcoff.StorageClass.External
+    else:
+        return libcoff.StorageClass.Static
+
+def getCoffRelocationType(is64Bit, reloc):
+    if reloc.operandSize != size32:
+        raise ValueError("Non-32-bit relocations are not supported.")
+
+    if reloc.isRelative: # I don't think we need to account for 16-bit relocations.
+                         # We don't emit those, and doing so anyway would be dangerous.
+        return libcoff.RelocationType.AMD64_REL32 if is64Bit else libcoff.RelocationType.I386_REL32
+    else:
+        return libcoff.RelocationType.AMD64_ADDR32 if is64Bit else libcoff.RelocationType.I386_DIR32
+
+def createObjectFile(asm, is64Bit):
+    
+    align = libcoff.SectionHeaderFlags.Align16Bytes if is64Bit else libcoff.SectionHeaderFlags.Align4Bytes
+    arch = libcoff.MachineType.Amd64 if is64Bit else libcoff.MachineType.I386
+
+    # This section layout is copied from gcc, so it ought to work.
+    code = System.Array[System.Byte](asm.code)
+
+    codeSection = libcoff.Section(".text", 0, libcoff.SectionHeaderFlags.MemExecute
+                                            | libcoff.SectionHeaderFlags.MemRead
+                                            | libcoff.SectionHeaderFlags.CntCode
+                                            | align, code)    
+    dataSection = libcoff.Section(".data", 0, libcoff.SectionHeaderFlags.MemRead
+                                            | libcoff.SectionHeaderFlags.MemWrite
+                                            | libcoff.SectionHeaderFlags.CntInitializedData
+                                            | align)
+    bssSection = libcoff.Section(".bss", 0, libcoff.SectionHeaderFlags.MemRead
+                                          | libcoff.SectionHeaderFlags.MemWrite
+                                          | libcoff.SectionHeaderFlags.CntUninitializedData
+                                          | align)
+
+    sections = System.Array[libcoff.Section]([codeSection, dataSection, bssSection])
+
+    # Collect all our used symbols to write them to the COFF file.
+    symbols = System.Collections.Generic.List[libcoff.Symbol]()
+
+    # Define a "fake" file directive: this is a gcc hack.
+    auxSymbols = System.Array[libcoff.IAuxiliarySymbol]([libcoff.AuxiliaryFileName("fake")])
+    symbols.Add(libcoff.Symbol(".file", libcoff.SymbolMode.Debug, 0, codeSection,
+                               libcoff.SymbolType(), libcoff.StorageClass.File, auxSymbols))
+    
+    # Each section has its own entry in the symbol table.
+    for i in range(len(sections)):
+        section = sections[i]
+        sectDef = libcoff.AuxiliarySectionDefinition(section, i + 1)
+        auxSymbols = System.Array[libcoff.IAuxiliarySymbol]([sectDef])
+        symbols.Add(libcoff.Symbol(section.Name, libcoff.SymbolMode.Normal, 0, section,
+                                   libcoff.SymbolType(), libcoff.StorageClass.Static, auxSymbols))
+
+    # Finally, actually put the symbols from our code in the table. Relocations
+    # are sorted by offset, so their order does not depend on the order in
+    # which the fixups were patched.
+    relocations = sorted(asm.relocations, key=lambda reloc: reloc.offset)
+    for sym in asm.symbols.values():
+        sec = None if sym.isExternal else codeSection
+        newSymbol = libcoff.Symbol(sym.name, sym.offset, sec, getCoffStorageClass(sym))
+        symbols.Add(newSymbol)
+        for reloc in relocations:
+            # Append all of the relevant relocations.
+            if reloc.symbol == sym:
+                relocType = getCoffRelocationType(is64Bit, reloc)
+                relocObject = libcoff.Relocation(reloc.offset, newSymbol, relocType)
+                codeSection.Relocations.Add(relocObject)
+            
+    return libcoff.ObjectFile(arch, sections, symbols, libcoff.CoffHeaderFlags())
+
+def getEntryPoint(asm):
+    return asm.getSymbol("main") if (asm.hasSymbol("main") and asm.getSymbol("main").isPublic) else None
+
+def getEntryPointOffset(asm):
+    return getEntryPoint(asm).offset if getEntryPoint(asm) != None else 0
+
+def prepareObjectFile(asm):
+    """ Patches the given assembler's labels for a COFF object file, which
+    leaves absolute references to the linker. """
+    asm.baseOffset = 0
+    asm.relocateAbsolutes = False
+    asm.patchLabels()
+
+def writeObjectFile(asm, path, is64Bit = True):
+    """ Writes the given assembler's bytecode to a COFF object file. """
+    libcoff.CoffWriter.WriteToFile(path, createObjectFile(asm, is64Bit))
+
+def prepareComFile(asm):
+    """ Patches the given assembler's labels for an MS-DOS COM file, which is
+    loaded at offset 0x100. """
+    asm.baseOffset = 0x100
+    asm.patchLabels()
+
+def writeComFile(asm, path):
+    """ Writes the given assembler's bytecode to an MS-DOS COM file. If there
+    is a public 'main' symbol that is not at the start of the bytecode, the
+    file starts with a jump to it. """
+    offset = getEntryPointOffset(asm)
+    with open(path, "wb") as target:
+        if offset != 0:
+            # 0xe9 is a relative JMP instruction.
+            target.write(bytearray([0xe9] + to32le(offset)))
+        target.write(asm.getCodeView())
@@ -0,0 +1,325 @@
+import bisect
+import re
+import sys
+import threading
+import System
+import Assembler
+import Instructions
+import Lexer
+import Parser
+import Symbols
+from Incremental import DiagnosticsList
+from libdiagnostics import DiagnosticsException
+
+# Matches lines that start with a label definition.
+labelLinePattern = re.compile(r"^[ \t]*[A-Za-z_]\w*[ \t]*:", re.MULTILINE)
+
+def getProcessorCount():
+    """ Gets the number of processors. """
+    return System.Environment.ProcessorCount
+
+def splitDocument(text, count):
+    """ Splits the given source text into at most `count` [start, end) ranges
+    of roughly equal size. Every range but the first starts at a line that
+    defines a label, so few references to labels cross ranges. """
+    bounds = [0]
+    for i in range(1, count):
+        match = labelLinePattern.search(text, len(text) * i // count)
+        if match is None:
+            break
+        if match.start() > bounds[-1]:
+            bounds.append(match.start())
+    bounds.append(len(text))
+    return list(zip(bounds, bounds[1:]))
+
+def parseRange(doc, log, lineCache, start, end):
+    """ Lazily parses the [start, end) range of the given document, and yields
+    its instructions as (node, TokenSpan) pairs. The line cache is used if it
+    is not None. """
+    if lineCache is not None:
+        return lineCache.parseDocument(doc, log, start, end)
+    return parseTokenRange(doc, log, start, end)
+
+def parseTokenRange(doc, log, start, end):
+    """ Lazily lexes and parses the [start, end) range of the given document as
+    a whole, and yields its instructions as (node, TokenSpan) pairs. Lexer
+    errors are logged, and skip the line they occur on, as they do in
+    LineCache.parseDocument. """
+    text = doc.Source
+    while start < end:
+        tokens = Lexer.lexTokens(doc, Lexer.getLexerDFA(), start, end)
+        # Instructions are held back until the parser moves past their line,
+        # so a lexer error can discard the instructions that precede it on its
+        # line.
+        pending = []
+        lineEnd = start
+        try:
+            for item in Parser.parseLocatedInstructions(Parser.TokenStream(tokens, doc, log, True, end)):
+                position = item[1].first.start
+                if position >= lineEnd:
+                    for pendingItem in pending:
+                        yield pendingItem
+                    pending = []
+                    lineEnd = text.find("\n", position, end)
+                    if lineEnd < 0:
+                        lineEnd = end
+                pending.append(item)
+        except DiagnosticsException as ex:
+            log.LogError(ex.Entry)
+            errorPosition = ex.Entry.Location.Position
+            if errorPosition >= lineEnd:
+                for pendingItem in pending:
+                    yield pendingItem
+            start = text.find("\n", errorPosition, end)
+            if start < 0:
+                return
+            start += 1
+        else:
+            for pendingItem in pending:
+                yield pendingItem
+            return
+
+def runInParallel(functions, threadCount):
+    """ Calls the given functions on up to `threadCount` threads, and waits for
+    them to finish. The first exception that is raised by a function is
+    raised again on the calling thread. """
+    pending = list(reversed(functions))
+    errors = []
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                if not pending or errors:
+                    return
+                function = pending.pop()
+            try:
+                function()
+            except Exception:
+                with lock:
+                    errors.append(sys.exc_info())
+
+    threads = [threading.Thread(target=work) for _ in range(min(threadCount, len(functions)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        errorType, error, traceback = errors[0]
+        raise errorType, error, traceback
+
+class MergeConflict(Exception):
+    """ Raised when fragments cannot be merged into the result that assembling
+    their document serially would produce. """
+    pass
+
+class FragmentAssembler(Assembler.Assembler):
+    """ An assembler for a fragment of a document, which is assembled as
+    though it starts at offset zero. References to symbols that are not
+    defined in the fragment remain pending, and are resolved when the
+    fragments are merged. """
+
+    def __init__(self):
+        Assembler.Assembler.__init__(self)
+        self.isPositionDependent = False
+
+    def getSymbolAt(self, offset):
+        # Absolute offsets cannot be resolved before the fragment's own offset
+        # is known.
+        self.isPositionDependent = True
+        return Assembler.Assembler.getSymbolAt(self, offset)
+
+    def fitsShortBranch(self, operand):
+        # Branches to symbols that are defined in other fragments are checked
+        # when the fragments are merged.
+        symbol = operand.symbol
+        if not symbol.isDefined:
+            return True
+        return Assembler.Assembler.fitsShortBranch(self, operand)
+
+class Fragment(object):
+    """ A range of a document that is lexed, parsed and assembled on its own.
+    Its diagnostics are collected, so they can be logged in order later. """
+
+    def __init__(self, doc, start, end):
+        self.doc = doc
+        self.start = start
+        self.end = end
+        self.asm = FragmentAssembler()
+        self.log = DiagnosticsList()
+
+    def assemble(self, lineCache):
+        """ Lexes, parses and assembles this fragment, and relaxes the branches
+        whose targets are defined in it. """
+        instrs = parseRange(self.doc, self.log, lineCache, self.start, self.end)
+        Assembler.processLocatedInstructions(self.asm, instrs, self.log)
+        self.asm.relax()
+
+    def growBranches(self, indices):
+        """ Grows the branches of the nodes with the given indices to their
+        long form, reassembles this fragment, and relaxes it again. """
+        self.asm.longBranches.update(indices)
+        self.asm.reassemble()
+        self.asm.relax()
+
+def rebaseOperand(operand, asm, delta):
+    """ Copies an operand that was written by a fragment assembler, so that it
+    refers to the given assembler's symbols, and shifts its offsets by
+    `delta` bytes. Operands that do not refer to symbols are shared. """
+    operandType = type(operand)
+    if operandType is Instructions.SymbolOperand:
+        relativeOffset = operand.relativeOffset + delta if operand.isRelative else None
+        return Instructions.SymbolOperand(asm.symbols[operand.symbol.name], operand.operandSize,
+                                          operand.offset + delta, relativeOffset)
+    elif operandType is Instructions.LabelOperand or operandType is Instructions.RelativeLabelOperand:
+        if operandType is Instructions.LabelOperand:
+            result = Instructions.LabelOperand(operand.labelName, operand.operandSize)
+        else:
+            result = Instructions.RelativeLabelOperand(operand.offset + delta, operand.labelName,
+                                                       operand.operandSize)
+        if operand.placementIndex is not None:
+            result.placementIndex = operand.placementIndex + delta
+        return result
+    elif operandType is Instructions.MemoryOperand:
+        return Instructions.MemoryOperand(operand.addressRegister,
+                                          rebaseOperand(operand.displacement, asm, delta),
+                                          operand.operandSize)
+    elif operandType is Instructions.SIBMemoryOperand:
+        return Instructions.SIBMemoryOperand(operand.baseRegister, operand.indexRegister,
+                                             operand.indexShift,
+                                             rebaseOperand(operand.displacement, asm, delta),
+                                             operand.operandSize)
+    elif operandType is Instructions.BinaryOperand:
+        return Instructions.BinaryOperand(rebaseOperand(operand.left, asm, delta), operand.op,
+                                          rebaseOperand(operand.right, asm, delta))
+    else:
+        return operand
+
+def mergeSymbol(asm, symbol, delta):
+    """ Merges a fragment's symbol into the given assembler, in the way that
+    assembling the fragment's nodes would have. """
+    if not asm.hasSymbol(symbol.name):
+        if symbol.isExternal:
+            asm.defineSymbol(Symbols.ExternalSymbol(symbol.name))
+        else:
+            offset = symbol.offset + delta if symbol.isDefined else None
+            asm.defineSymbol(Symbols.LocalSymbol(symbol.name, offset, symbol.isPublic))
+        return
+
+    # The symbol was encountered by an earlier fragment, so this fragment's
+    # nodes may have been assembled differently than they would have been
+    # serially, if it declares or defines the symbol.
+    try:
+        if symbol.isExternal:
+            asm.defineSymbol(Symbols.ExternalSymbol(symbol.name))
+        elif symbol.isDefined:
+            asm.defineSymbol(Symbols.LocalSymbol(symbol.name, symbol.offset + delta))
+        if not symbol.isExternal and symbol.isPublic:
+            asm.getSymbol(symbol.name).makePublic()
+    except ValueError:
+        raise MergeConflict()
+
+def mergeFragments(fragments):
+    """ Concatenates the given fragments' bytecode, symbols, fixups, relocations
+    and branches into a single assembler, and patches the references between
+    fragments. MergeConflict is raised if the result would differ from
+    assembling the fragments' nodes serially. """
+    asm = Assembler.Assembler()
+    for fragment in fragments:
+        part = fragment.asm
+        if part.isPositionDependent:
+            raise MergeConflict()
+        delta = asm.index
+        nodeDelta = len(asm.nodes)
+
+        for symbol in part.symbols.values():
+            mergeSymbol(asm, symbol, delta)
+
+        asm.code.extend(part.code)
+        asm.index += part.index
+        asm.nodes.extend(part.nodes)
+        asm.failedNodes.update(index + nodeDelta for index in part.failedNodes)
+        for name, fixups in part.fixups.items():
+            asm.fixups.setdefault(name, []).extend(
+                (offset + delta, width, rebaseOperand(operand, asm, delta))
+                for offset, width, operand in fixups)
+        asm.relocations.extend(rebaseOperand(operand, asm, delta) for operand in part.relocations)
+        asm.shortBranches.extend((index + nodeDelta, rebaseOperand(operand, asm, delta))
+                                 for index, operand in part.shortBranches)
+        asm.longBranches.update(index + nodeDelta for index in part.longBranches)
+        for name, (count, saved) in part.savedBytes.items():
+            total = asm.savedBytes.setdefault(name, [0, 0])
+            total[0] += count
+            total[1] += saved
+
+    # Index the symbols in the order in which they were defined, which the
+    # fragments' indices preserve, rather than in the order in which they
+    # were encountered.
+    asm.symbolsByOffset = {}
+    asm.symbolOffsets = []
+    delta = 0
+    for fragment in fragments:
+        for offset in fragment.asm.symbolOffsets:
+            symbol = asm.symbols[fragment.asm.symbolsByOffset[offset].name]
+            if symbol.offset == offset + delta and symbol.offset not in asm.symbolsByOffset:
+                asm.symbolsByOffset[symbol.offset] = symbol
+                asm.symbolOffsets.append(symbol.offset)
+        delta += fragment.asm.index
+
+    for name in list(asm.fixups.keys()):
+        asm.patchSymbol(name)
+    return asm
+
+def assembleDocument(doc, log, lineCache = None, threadCount = None):
+    """ Assembles the given document in parallel, and returns the assembler.
+    The document is split into fragments at label definitions, and the
+    fragments are lexed, parsed and assembled on separate threads, as though
+    each of them starts at offset zero. The fragments are then merged, and
+    branches between fragments are relaxed, by growing them and assembling
+    the fragments they belong to again. The result is the same as that of
+    assembling the document serially. Documents whose fragments cannot be
+    merged that way, for example because they refer to absolute offsets, are
+    assembled serially. Diagnostics are logged in order. """
+    if threadCount is None:
+        threadCount = getProcessorCount()
+    elif threadCount < 1:
+        raise ValueError("cannot assemble a document on %d threads" % threadCount)
+
+    # Make sure that the lexer is compiled or loaded once, up front.
+    Lexer.getLexerDFA()
+
+    fragments = [Fragment(doc, start, end) for start, end in splitDocument(doc.Source, threadCount)]
+    runInParallel([lambda fragment=fragment: fragment.assemble(lineCache) for fragment in fragments],
+                  threadCount)
+
+    try:
+        while True:
+            asm = mergeFragments(fragments)
+            grown = [index for index, operand in asm.shortBranches
+                     if not asm.fitsShortBranch(operand)]
+            if not grown:
+                break
+
+            # Grow the branches in the fragments that they belong to, and
+            # assemble those fragments again.
+            nodeOffsets = []
+            nodeCount = 0
+            for fragment in fragments:
+                nodeOffsets.append(nodeCount)
+                nodeCount += len(fragment.asm.nodes)
+            indices = {}
+            for index in grown:
+                i = bisect.bisect_right(nodeOffsets, index) - 1
+                indices.setdefault(i, []).append(index - nodeOffsets[i])
+            runInParallel([lambda fragment=fragments[i], fragmentIndices=fragmentIndices:
+                               fragment.growBranches(fragmentIndices)
+                           for i, fragmentIndices in indices.items()], threadCount)
+    except MergeConflict:
+        asm = Assembler.Assembler()
+        Assembler.processLocatedInstructions(asm, parseRange(doc, log, lineCache, 0, len(doc.Source)), log)
+        return asm
+
+    for fragment in fragments:
+        for entry in fragment.log.entries:
+            log.LogError(entry)
+    return asm
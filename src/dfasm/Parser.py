@@ -4,6 +4,9 @@ import Symbols
 import libdiagnostics
 from Encoding import *
 from libdiagnostics import DiagnosticsException
+from collections import deque
+import mmap
+import os
 
 precedence = {
     "asterisk" : 0,
@@ -30,63 +33,148 @@ operations = {
 }
 
 class TokenStream(object):
-    """ Defines a token stream. Internally, this is a list of tokens, together
-    with an index to scroll through it, and some document/log objects that are
-    used to give useful diagnostics back to the user on parse failure. """
-
-    def __init__(self, tokens, doc, log):
-        self.tokens = tokens
-        self.index = 0
+    """ Defines a token stream. Internally, this is an iterator over tokens,
+    together with a buffer of tokens that have been read from said iterator
+    but not consumed yet, and some document/log objects that are used to give
+    useful diagnostics back to the user on parse failure. Tokens are only
+    read from the iterator when they are needed, so lazily lexed tokens are
+    parsed as they are produced.
+
+    The buffer only contains non-trivia tokens. Trivia tokens are attached to
+    the non-trivia token that follows them, so peeking at or reading the next
+    non-trivia token takes constant time. """
+
+    def __init__(self, tokens, doc, log, newlines = False, end = None):
+        """ Creates a token stream from the given iterable of tokens. If
+        `newlines` is set, then newline tokens are not trivia: they separate
+        instructions, so a whole document can be parsed at once. If the tokens
+        do not run up to the end of the document, then `end` is the position
+        of the character that follows them, such as the newline at the end of
+        a line. """
+        self.source = iter(tokens)
+        # A queue of non-trivia tokens that have been read from the source.
+        self.buffer = deque()
+        # A queue of lists of trivia tokens, such that `leadingTrivia[i]`
+        # precedes `buffer[i]`.
+        self.leadingTrivia = deque()
+        # The trivia tokens that follow the last buffered non-trivia token.
+        self.trailingTrivia = []
         self.doc = doc
         self.log = log
+        self.triviaTypes = Lexer.lineTriviaTypes if newlines else Lexer.triviaTypes
+        self.lastToken = None
+        self.endToken = None
+        self.end = end
 
     def endOfStream(self):
         """ Return a token representing the end of the current stream -- this
         is an instance method, since the location in the source code differs
         across token streams. """
-        location = libdiagnostics.SourceLocation.End(self.doc)
-        return Lexer.Token("", "end-of-stream", location)
+        if self.endToken is None:
+            if self.end is None or self.end >= len(self.doc.Source):
+                location = libdiagnostics.SourceLocation.End(self.doc)
+            else:
+                location = libdiagnostics.SourceLocation(self.doc, self.end, 1)
+            self.endToken = Lexer.Token("", "end-of-stream", location)
+        return self.endToken
+
+    def isTriviaToken(self, token):
+        """ Finds out if the given token is trivia in this token stream. """
+        return token.type in self.triviaTypes
+
+    def push(self, token):
+        """ Adds a token that was read from the source to the buffer, or to the
+        trailing trivia. Returns True if the token is not trivia. """
+        if token.type in self.triviaTypes:
+            self.trailingTrivia.append(token)
+            return False
+        self.buffer.append(token)
+        self.leadingTrivia.append(self.trailingTrivia)
+        self.trailingTrivia = []
+        return True
+
+    def fill(self):
+        """ Makes sure that at least one non-trivia token is buffered, and
+        returns False if the stream runs out of tokens before that happens. """
+        if self.buffer:
+            return True
+        for token in self.source:
+            if self.push(token):
+                return True
+        return False
 
     def remainingTokens(self):
         """ Return the list of remaining tokens in the stream. """
-        return self.tokens[self.index:]
+        for token in self.source:
+            self.push(token)
+        results = []
+        for trivia, token in zip(self.leadingTrivia, self.buffer):
+            results.extend(trivia)
+            results.append(token)
+        results.extend(self.trailingTrivia)
+        return results
 
     def peek(self):
         """ Peeks a token from the token stream. """
-        if self.index >= len(self.tokens):
+        if self.fill():
+            trivia = self.leadingTrivia[0]
+            return trivia[0] if trivia else self.buffer[0]
+        elif self.trailingTrivia:
+            return self.trailingTrivia[0]
+        else:
             return self.endOfStream()
-        return self.tokens[self.index]
 
     def peekNoTrivia(self):
         """ Peeks a non-trivia token from the token stream. """
-        for token in self.remainingTokens():
-            if not token.isTrivia():
-                return token
+        if self.fill():
+            return self.buffer[0]
         return self.endOfStream()
 
     def isEmpty(self):
         """ Finds out if the token stream is empty. """
-        return self.index >= len(self.tokens)
+        return not self.fill() and not self.trailingTrivia
 
     def isTrivia(self):
         """ Finds out if all future tokens in the token stream are trivia. """
-        return all(item.isTrivia() for item in self.remainingTokens())
+        return not self.fill()
+
+    def isEndOfInstruction(self):
+        """ Finds out if the current instruction ends here: either all future
+        tokens are trivia, or the next non-trivia token is a newline. """
+        return not self.fill() or self.buffer[0].type == "newline"
 
     def nextToken(self):
         """ Reads the next token from the token stream. """
-        token = self.peek()
-        self.index += 1
+        if self.fill():
+            trivia = self.leadingTrivia[0]
+            if trivia:
+                token = trivia.pop(0)
+            else:
+                token = self.buffer.popleft()
+                self.leadingTrivia.popleft()
+        elif self.trailingTrivia:
+            token = self.trailingTrivia.pop(0)
+        else:
+            token = self.endOfStream()
+        self.lastToken = token
         return token
 
     def skipTrivia(self):
         """ Skips trivia tokens. """
-        while self.peek().isTrivia():
-            self.nextToken()
+        if self.fill():
+            self.leadingTrivia[0] = []
+        else:
+            self.trailingTrivia = []
 
     def nextNoTrivia(self, tokenType = None):
         """ Reads the next non-trivia token. """
-        self.skipTrivia()
-        result = self.nextToken()
+        if self.fill():
+            result = self.buffer.popleft()
+            self.leadingTrivia.popleft()
+        else:
+            self.trailingTrivia = []
+            result = self.endOfStream()
+        self.lastToken = result
         if tokenType is not None and result.type != tokenType:
             errorMsg = "Expected token of type '%s', got token of " \
                        "type '%s' instead." % (tokenType, result.type)
@@ -113,6 +201,46 @@ class IntegerNode(LiteralNode):
     def __repr__(self):
         return "IntegerNode(%r)" % self.token
 
+class StringNode(LiteralNode):
+    """ Describes a string literal syntax node. """
+
+    @property
+    def text(self):
+        """ Gets the text between the string literal's quotes, as it appears in
+        the source code. Escape sequences are not resolved. """
+        return self.token.contents[1:-1]
+
+    @property
+    def value(self):
+        """ Gets the string literal's value: the text between its quotes, with
+        escape sequences resolved. """
+        try:
+            return self.text.decode('string_escape')
+        except ValueError as ex:
+            raise ValueError("String literal '%s' contains an invalid escape sequence: %s."
+                             % (self.token, ex))
+
+    def toBytes(self):
+        """ Converts the string literal to a bytearray. """
+        value = self.value
+        try:
+            return bytearray(value)
+        except ValueError:
+            raise ValueError("String literal '%s' contains characters that are not in the 0-255 range."
+                             % self.token)
+
+    def toOperand(self, asm):
+        """ Converts the string literal node to an operand. Only single-character
+        string literals can be used as operands. """
+        value = self.value
+        if len(value) != 1:
+            raise ValueError("String literal '%s' must contain exactly one character to be used as an operand."
+                             % self.token)
+        return Instructions.ImmediateOperand.createSigned(ord(value))
+
+    def __repr__(self):
+        return "StringNode(%r)" % self.token
+
 class IdentifierNode(LiteralNode):
     """ Describes an identifier syntax node. """
 
@@ -120,7 +248,7 @@ class IdentifierNode(LiteralNode):
         """ Converts the identifier node to an operand. """
         name = self.token.contents
         if name in Instructions.registers:  # Maybe we'll get lucky and encounter a register.
-            return Instructions.RegisterOperand(Instructions.registers[name])
+            return Instructions.registerOperands[name]
         else:
             return Instructions.LabelOperand(name, size32)
 
@@ -456,16 +584,47 @@ class IntegerDataDirective(DirectiveNodeBase):
     def __repr__(self):
         return "IntegerDataDirective(%r, %r, %r, %r)" % (self.dot, self.typeToken, self.size, self.dataList)
 
+    def writeValues(self, asm, values, maxSize):
+        """ Range-checks a run of integer arguments, and writes them in one go.
+        If an argument is out of range, the arguments that precede it are
+        written before the error is raised. """
+        if values and (min(values) < 0 or max(values) > maxSize):
+            invalid = next(i for i, value in enumerate(values) if not 0 <= value <= maxSize)
+            self.writeValues(asm, values[:invalid], maxSize)
+            raise ValueError("'.%s' directive arguments must be in the 0-%d range."
+                             % (self.typeToken, maxSize))
+        if values:
+            asm.write(packUnsigned(self.size.size, values))
+        del values[:]
+
     def apply(self, asm):
-        for operand in self.dataList.toOperands(asm):
+        maxSize = 2 ** (self.size.size * 8) - 1
+        # Integer arguments are collected, and written as a single run of
+        # bytes when a string, label or the end of the list is encountered.
+        values = []
+        for node in self.dataList:
+            if isinstance(node, StringNode):
+                # String literals are written as a single run of bytes, or as
+                # one zero-extended value per character for wider types.
+                self.writeValues(asm, values, maxSize)
+                data = node.toBytes()
+                if self.size == size8:
+                    asm.write(data)
+                else:
+                    asm.write(packUnsigned(self.size.size, data))
+                continue
+
+            operand = node.toOperand(asm)
+            if isinstance(operand, Instructions.ImmediateOperand):
+                values.append(operand.value)
+                continue
+
+            self.writeValues(asm, values, maxSize)
             if not isinstance(operand, Instructions.ImmediateOperandBase):
                 raise ValueError("'.%s' directive arguments must be immediate operands."
                                  % self.typeToken)
-            maxSize = 2 ** (self.size.size * 8) - 1
-            if not 0 <= operand.value <= maxSize:
-                raise ValueError("'.%s' directive arguments must be in the 0-%d range."
-                                 % (self.typeToken, maxSize))
             asm.writeArgument(operand.cast(self.size))
+        self.writeValues(asm, values, maxSize)
 
 class DataArrayDirective(DirectiveNodeBase):
     def __init__(self, dot, typeToken, arrayToken, size, length, element):
@@ -511,9 +670,79 @@ class DataArrayDirective(DirectiveNodeBase):
             raise ValueError("'%s' directive element must be in the 0-%d range."
                              % (self.headerStr(), maxSize))
 
+        # The array is written as a single run of repeated bytes.
         arrElem = elem.toUnsigned().cast(self.size)
-        for _ in range(arrLength):
-            asm.writeArgument(arrElem)
+        asm.write(bytearray(arrElem.getData(asm)) * arrLength)
+
+class IncbinDirective(DirectiveNodeBase):
+    def __init__(self, dot, incbin, argumentList):
+        """ `dot` and `incbin` are tokens containing the directive, and
+        `argumentList` is a SeparatedList containing the path of the file to
+        include, optionally followed by an offset and a length, as syntax
+        nodes. """
+        self.dot = dot
+        self.incbin = incbin
+        self.argumentList = argumentList
+
+    def __str__(self):
+        return "%s%s %s" % (self.dot, self.incbin, self.argumentList)
+
+    def __repr__(self):
+        return "IncbinDirective(%r, %r, %r)" % (self.dot, self.incbin, self.argumentList)
+
+    def getRange(self, asm, fileSize):
+        """ Gets the [start, end) range of the file to include. """
+        bounds = []
+        for node in list(self.argumentList)[1:]:
+            operand = node.toOperand(asm)
+            if not isinstance(operand, Instructions.ImmediateOperand) or operand.value < 0:
+                raise ValueError("The offset and length arguments to '.%s' must be non-negative "
+                                 "integers." % self.incbin)
+            bounds.append(operand.value)
+        start = bounds[0] if len(bounds) > 0 else 0
+        end = start + bounds[1] if len(bounds) > 1 else fileSize
+        if start > fileSize:
+            raise ValueError("'.%s' offset %d exceeds the size of the file (%d bytes)."
+                             % (self.incbin, start, fileSize))
+        if end > fileSize:
+            raise ValueError("'.%s' range %d-%d exceeds the size of the file (%d bytes)."
+                             % (self.incbin, start, end, fileSize))
+        return start, end
+
+    def getPath(self, pathNode):
+        """ Gets the path of the file to include. The path is taken as written,
+        without resolving escape sequences, so Windows paths need not escape
+        their backslashes. Relative paths are relative to the directory of the
+        source file that contains the directive, or to the working directory
+        if the source code was not read from a file. """
+        docPath = self.incbin.location.Document.Identifier
+        return os.path.join(os.path.dirname(docPath), pathNode.text)
+
+    def apply(self, asm):
+        """ Writes the contents of the file, or the given range of it, to the
+        assembler. The file is memory-mapped, and the range is copied from the
+        mapping into the bytecode buffer in one go, without an intermediate
+        string. """
+        args = list(self.argumentList)
+        if not 1 <= len(args) <= 3 or not isinstance(args[0], StringNode):
+            raise ValueError("'.%s' takes a file path string, optionally followed by an "
+                             "offset and a length." % self.incbin)
+
+        path = self.getPath(args[0])
+        try:
+            with open(path, "rb") as blob:
+                fileSize = os.fstat(blob.fileno()).st_size
+                start, end = self.getRange(asm, fileSize)
+                # Empty files cannot be mapped.
+                if start == end:
+                    return
+                mapping = mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    asm.write(buffer(mapping, start, end - start))
+                finally:
+                    mapping.close()
+        except (IOError, OSError) as ex:
+            raise ValueError("Could not read '%s': %s" % (path, ex.strerror or ex))
 
 def parseArgument(tokens):
     """ Parse an argument to an instruction:
@@ -531,7 +760,7 @@ def parseArgumentList(tokens):
              ^~~~~~~~~~~
     """
     results = []
-    while not tokens.isTrivia():
+    while not tokens.isEndOfInstruction():
         if len(results) == 0:
             sep = None
         elif tokens.peekNoTrivia().type == "comma":
@@ -617,6 +846,8 @@ def parseLiteral(tokens):
     """
     if tokens.peekNoTrivia().type == "integer":
         return IntegerNode(tokens.nextNoTrivia())
+    elif tokens.peekNoTrivia().type == "string":
+        return StringNode(tokens.nextNoTrivia())
     else:
         return IdentifierNode(tokens.nextNoTrivia("identifier"))
 
@@ -666,6 +897,8 @@ def parseDirective(tokens, dot):
     elif dirName.contents == "extrn" or dirName.contents == "extern":
         symName = tokens.nextNoTrivia("identifier")
         return ExternDirective(dot, dirName, symName)
+    elif dirName.contents == "incbin":
+        return IncbinDirective(dot, dirName, parseArgumentList(tokens))
     elif isSize(dirName.contents):
         if tokens.peekNoTrivia().contents == "array":
             arrTok = tokens.nextNoTrivia()
@@ -696,7 +929,7 @@ def parseInstruction(tokens):
     first = tokens.nextNoTrivia("identifier")
 
     # If a colon follows the first token, this is a label.
-    if not tokens.isTrivia() and tokens.peekNoTrivia().type == "colon":
+    if tokens.peekNoTrivia().type == "colon":
         label = LabelNode(first, tokens.nextNoTrivia())
         return label
 
@@ -704,9 +937,35 @@ def parseInstruction(tokens):
     argList = parseArgumentList(tokens)
     return InstructionNode(first, argList)
 
+class TokenSpan(object):
+    """ Describes the range of source code from one token up to and including
+    another token. Its location is only created when it is requested. """
+    __slots__ = ('first', 'last')
+
+    def __init__(self, first, last):
+        self.first = first
+        self.last = last
+
+    @property
+    def location(self):
+        """ Gets the source location that spans this range of tokens. """
+        return self.first.location.Between(self.last.location)
+
+    def __repr__(self):
+        return "TokenSpan(%r, %r)" % (self.first, self.last)
+
+def parseLocatedInstructions(tokens):
+    """ Lazily parses all instructions in the token stream, and yields each of
+    them together with the TokenSpan that covers its tokens. Newlines that
+    separate instructions are skipped. """
+    while not tokens.isTrivia():
+        first = tokens.peekNoTrivia()
+        if first.type == "newline":
+            tokens.nextNoTrivia()
+            continue
+        node = parseInstruction(tokens)
+        yield node, TokenSpan(first, tokens.lastToken)
+
 def parseAllInstructions(tokens):
     """ Parses all instructions in the token stream. """
-    results = []
-    while not tokens.isTrivia():
-        results.append(parseInstruction(tokens))
-    return results
\ No newline at end of file
+    return [node for node, _ in parseLocatedInstructions(tokens)]
\ No newline at end of file
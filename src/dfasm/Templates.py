@@ -0,0 +1,155 @@
+import Instructions
+from Builders import builders, templateMnemonics
+
+memoryOperandTypes = (Instructions.MemoryOperand, Instructions.SIBMemoryOperand)
+
+def getOperandShape(operand):
+    """ Gets a hashable value that describes everything about the given operand
+    that an instruction's encoding may depend on, except for the values of its
+    immediates and displacements. None is returned for operands that refer to
+    symbols, as those may require fixups or relocations. """
+    operandType = type(operand)
+    if operandType is Instructions.RegisterOperand:
+        return operand.register
+    elif operandType is Instructions.ImmediateOperand:
+        return (operandType, operand.operandSize.size)
+    elif operandType in memoryOperandTypes:
+        if type(operand.displacement) is not Instructions.ImmediateOperand:
+            return None
+        if operandType is Instructions.MemoryOperand:
+            registers = (operand.addressRegister,)
+        else:
+            registers = (operand.baseRegister, operand.indexRegister, operand.indexShift)
+        return (operandType, registers, operand.displacement.operandSize.size, operand.operandSize.size)
+    else:
+        return None
+
+def getTemplateKey(name, args):
+    """ Gets the key under which the template for the given instruction is
+    cached, or None if the instruction cannot be written from a template. """
+    if name not in templateMnemonics:
+        return None
+    shapes = tuple(getOperandShape(arg) for arg in args)
+    if None in shapes:
+        return None
+    return (name, shapes)
+
+def findSlot(arg, args):
+    """ Finds the argument that the given written operand was derived from,
+    and returns an (argument index, operand size) slot. The operand size is
+    None if the argument can be written as it is. None is returned if there
+    is no such argument, or if the written operand is ambiguous. """
+    if type(arg) is Instructions.ImmediateOperand:
+        matches = [i for i, other in enumerate(args)
+                   if type(other) is Instructions.ImmediateOperand and other.value == arg.value]
+        size = arg.operandSize
+    elif type(arg) in memoryOperandTypes:
+        # The data of a memory operand does not depend on its size.
+        matches = [i for i, other in enumerate(args) if type(other) in memoryOperandTypes]
+        size = None
+    else:
+        return None
+    if len(matches) != 1:
+        return None
+    return (matches[0], size)
+
+class InstructionTemplate(object):
+    """ The encoding of an instruction for a given shape of operands. It
+    consists of runs of fixed bytes (opcodes, ModRM and SIB bytes), and of
+    slots for the values of immediates and displacements. """
+
+    def __init__(self, items, savedBytes):
+        # A list of bytearrays and (argument index, operand size) slots.
+        self.items = items
+
+        # A list of (mnemonic, byte count) pairs that are recorded when the
+        # template is written, so the assembler's size report stays accurate.
+        self.savedBytes = savedBytes
+
+    def write(self, asm, args):
+        """ Writes this template to the given assembler, and fills in its slots
+        with the given arguments. """
+        for item in self.items:
+            if type(item) is bytearray:
+                asm.write(item)
+            else:
+                index, size = item
+                arg = args[index]
+                if size is not None and arg.operandSize != size:
+                    arg = arg.cast(size)
+                asm.writeArgument(arg)
+        for name, count in self.savedBytes:
+            asm.recordSavedBytes(name, count)
+
+class RecordingAssembler(object):
+    """ Forwards everything to an assembler, and records the bytes and operands
+    that are written, so they can be turned into an instruction template. """
+
+    def __init__(self, asm):
+        self.asm = asm
+        self.items = []
+        self.savedBytes = []
+
+    @property
+    def index(self):
+        return self.asm.index
+
+    def write(self, bytes):
+        self.items.append(bytearray(bytes))
+        self.asm.write(bytes)
+
+    def writeArgument(self, arg):
+        self.items.append(arg)
+        self.asm.writeArgument(arg)
+
+    def recordSavedBytes(self, name, count):
+        self.savedBytes.append((name, count))
+        self.asm.recordSavedBytes(name, count)
+
+    def __getattr__(self, name):
+        return getattr(self.asm, name)
+
+    def createTemplate(self, args):
+        """ Creates an instruction template from the recorded bytes and
+        operands. None is returned if an operand cannot be mapped to a slot. """
+        items = []
+        for item in self.items:
+            if type(item) is bytearray:
+                if items and type(items[-1]) is bytearray:
+                    items[-1].extend(item)
+                else:
+                    items.append(item)
+            elif item.dataSize > 0:
+                slot = findSlot(item, args)
+                if slot is None:
+                    return None
+                items.append(slot)
+        return InstructionTemplate(items, self.savedBytes)
+
+# A dictionary that maps (mnemonic, operand shapes) keys to instruction
+# templates. Templates do not depend on the assembler, so they are shared by
+# all assemblers.
+templates = {}
+
+def writeInstruction(asm, name, args):
+    """ Writes the instruction with the given mnemonic and arguments. If the
+    instruction has been encoded for operands of the same shape before, its
+    template is copied, and its slots are filled in. Otherwise, the
+    instruction's builder is used, and a template is created. """
+    key = getTemplateKey(name, args)
+    if key is None:
+        builders[name](asm, args)
+        return
+
+    template = templates.get(key)
+    if template is not None:
+        template.write(asm, args)
+        return
+
+    # Builders may reorder their argument list, so they get a copy, and slots
+    # refer to the original order.
+    recorder = RecordingAssembler(asm)
+    builders[name](recorder, list(args))
+    template = recorder.createTemplate(args)
+    if template is not None:
+        templates[key] = template
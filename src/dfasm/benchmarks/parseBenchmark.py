@@ -0,0 +1,47 @@
+""" Measures how long it takes to lex and parse long operand lists, such as
+1000-element `.byte` lines. Run this from the `src/dfasm` folder:
+
+    ipy benchmarks/parseBenchmark.py [<elements per line> [<lines>]]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clr
+clr.AddReference("Automata.dll")
+clr.AddReference("libdiagnostics.dll")
+
+import Lexer
+import Parser
+import libdiagnostics
+
+def createSource(elementCount, lineCount):
+    """ Creates a document with `lineCount` `.byte` directives, each of which
+    has `elementCount` elements. """
+    line = ".byte " + ", ".join(str(i % 256) for i in range(elementCount)) + "\n"
+    return line * lineCount
+
+def measure(elementCount, lineCount, repetitions = 5):
+    """ Lexes and parses a generated document a number of times, and returns
+    the fastest time, in seconds. """
+    doc = libdiagnostics.SourceDocument(createSource(elementCount, lineCount), "benchmark")
+    log = libdiagnostics.ConsoleLog(libdiagnostics.ConsoleEnvironment.AcquireConsole())
+    dfa = Lexer.getLexerDFA()
+    best = None
+    for _ in range(repetitions):
+        start = time.clock()
+        tokens = Parser.TokenStream(Lexer.lexTokens(doc, dfa), doc, log, True)
+        Parser.parseAllInstructions(tokens)
+        elapsed = time.clock() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+if __name__ == "__main__":
+    elementCount = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    lineCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    elapsed = measure(elementCount, lineCount)
+    print("%d lines of %d elements: %.3f s (%.2f us per element)"
+          % (lineCount, elementCount, elapsed, 1e6 * elapsed / (elementCount * lineCount)))
@@ -9,6 +9,10 @@ import System
 import Automata
 import Instructions
 import Assembler
+import Lexer
+import LineCache
+import Output
+import Parallel
 import libjit
 import libcoff
 import libdiagnostics
@@ -28,87 +32,21 @@ def printHex(values):
             return str(x)
     print("{ %s }" % ", ".join(showValue(x) for x in values))
 
-def getCoffStorageClass(symbol):
-    if symbol.isExternal or symbol.isPublic:
-        return libcoff.StorageClass.External
-    else:
-        return libcoff.StorageClass.Static
-
-def getCoffRelocationType(is64Bit, reloc):
-    if reloc.operandSize != size32:
-        raise ValueError("Non-32-bit relocations are not supported.")
-
-    if reloc.isRelative: # I don't think we need to account for 16-bit relocations.
-                         # We don't emit those, and doing so anyway would be dangerous.
-        return libcoff.RelocationType.AMD64_REL32 if is64Bit else libcoff.RelocationType.I386_REL32
-    else:
-        return libcoff.RelocationType.AMD64_ADDR32 if is64Bit else libcoff.RelocationType.I386_DIR32
-
-def createObjectFile(asm, is64Bit):
-    
-    align = libcoff.SectionHeaderFlags.Align16Bytes if is64Bit else SectionHeaderFlags.Align4Bytes
-    arch = libcoff.MachineType.Amd64 if is64Bit else libcoff.MachineType.I386
-
-    # This section layout is copied from gcc, so it ought to work.
-    code = System.Array[System.Byte](asm.code)
-
-    codeSection = libcoff.Section(".text", 0, libcoff.SectionHeaderFlags.MemExecute
-                                            | libcoff.SectionHeaderFlags.MemRead
-                                            | libcoff.SectionHeaderFlags.CntCode
-                                            | align, code)    
-    dataSection = libcoff.Section(".data", 0, libcoff.SectionHeaderFlags.MemRead
-                                            | libcoff.SectionHeaderFlags.MemWrite
-                                            | libcoff.SectionHeaderFlags.CntInitializedData
-                                            | align)
-    bssSection = libcoff.Section(".bss", 0, libcoff.SectionHeaderFlags.MemRead
-                                          | libcoff.SectionHeaderFlags.MemWrite
-                                          | libcoff.SectionHeaderFlags.CntUninitializedData
-                                          | align)
-
-    sections = System.Array[libcoff.Section]([codeSection, dataSection, bssSection])
-
-    # Collect all our used symbols to write them to the COFF file.
-    symbols = System.Collections.Generic.List[libcoff.Symbol]()
-
-    # Define a "fake" file directive: this is a gcc hack.
-    auxSymbols = System.Array[libcoff.IAuxiliarySymbol]([libcoff.AuxiliaryFileName("fake")])
-    symbols.Add(libcoff.Symbol(".file", libcoff.SymbolMode.Debug, 0, codeSection,
-                               libcoff.SymbolType(), libcoff.StorageClass.File, auxSymbols))
-    
-    # Each section has its own entry in the symbol table.
-    for i in range(len(sections)):
-        section = sections[i]
-        sectDef = libcoff.AuxiliarySectionDefinition(section, i + 1)
-        auxSymbols = System.Array[libcoff.IAuxiliarySymbol]([sectDef])
-        symbols.Add(libcoff.Symbol(section.Name, libcoff.SymbolMode.Normal, 0, section,
-                                   libcoff.SymbolType(), libcoff.StorageClass.Static, auxSymbols))
-
-    # Finally, actually put the symbols from our code in the table.
-    for sym in asm.symbols.values():
-        sec = None if sym.isExternal else codeSection
-        newSymbol = libcoff.Symbol(sym.name, sym.offset, sec, getCoffStorageClass(sym))
-        symbols.Add(newSymbol)
-        for reloc in asm.relocations:
-            # Append all of the relevant relocations.
-            if reloc.symbol == sym:
-                relocType = getCoffRelocationType(is64Bit, reloc)
-                relocObject = libcoff.Relocation(reloc.offset, newSymbol, relocType)
-                codeSection.Relocations.Add(relocObject)
-            
-    return libcoff.ObjectFile(arch, sections, symbols, libcoff.CoffHeaderFlags())
-
-def getEntryPoint(asm):
-	return asm.getSymbol("main") if (asm.hasSymbol("main") and asm.getSymbol("main").isPublic) else None
-	
-def getEntryPointOffset(asm):
-    return getEntryPoint(asm).offset if getEntryPoint(asm) != None else 0
-
-def processNode(asm, node, doc):
-    try:
-        asm.process(node)
-    except ValueError as ex:
-        wholeLine = libdiagnostics.SourceLocation(doc, 0, doc.CharacterCount)
-        raise DiagnosticsException('Invalid', str(ex), wholeLine)
+def reportPendingReferences(asm):
+    """ Prints a warning for every reference to a symbol that could not be
+    resolved. Their placeholder bytes are left as zeros. """
+    for name, offset in asm.getPendingReferences():
+        sys.stderr.write("warning: unresolved reference to '%s' at offset 0x%x\n" % (name, offset))
+
+def reportSavedBytes(asm):
+    """ Prints the number of bytes that were saved by writing instructions in
+    a shorter form than their general one, per mnemonic. """
+    total = 0
+    sys.stderr.write("size report:\n")
+    for name, (count, saved) in sorted(asm.savedBytes.items()):
+        sys.stderr.write("    %-8s %d bytes saved in %d instructions\n" % (name, saved, count))
+        total += saved
+    sys.stderr.write("    %-8s %d bytes saved\n" % ("total", total))
 
 debug = False
 jit = False
@@ -116,6 +54,11 @@ repl = True
 output = None
 arg = None
 retType = int
+inputPath = None
+lineCacheSize = 4096
+lineCacheStats = False
+sizeReport = False
+parallelThreads = 1
 
 for argument in sys.argv[1:]:
     if argument == "-d":
@@ -142,6 +85,23 @@ for argument in sys.argv[1:]:
         arg = eval(argument[len("-arg:"):])
     elif argument.startswith("-ret:"):
         retType = eval(argument[len("-ret:"):])
+    elif argument == "-no-lexer-cache":
+        Lexer.useLexerCache = False
+    elif argument.startswith("-line-cache:"):
+        lineCacheSize = int(argument[len("-line-cache:"):])
+    elif argument == "-line-cache-stats":
+        lineCacheStats = True
+    elif argument == "-size-report":
+        sizeReport = True
+    elif argument == "-parallel":
+        parallelThreads = None
+    elif argument.startswith("-parallel:"):
+        parallelThreads = int(argument[len("-parallel:"):])
+        if parallelThreads < 1:
+            sys.stderr.write("error: '%s' must use at least one thread\n" % argument)
+            sys.exit(1)
+    elif not argument.startswith("-"):
+        inputPath = argument
 
 asm = Assembler.Assembler()
 
@@ -150,7 +110,7 @@ lineIndex = 0
 
 log = libdiagnostics.ConsoleLog(libdiagnostics.ConsoleEnvironment.AcquireConsole())
 
-if sys.stdin.isatty():
+if inputPath is None and sys.stdin.isatty():
     print("Ready.")
     while sys.stdin:
         try:
@@ -165,7 +125,7 @@ if sys.stdin.isatty():
 
         doc = libdiagnostics.SourceDocument(line, "line " + str(lineIndex))
         try:
-            lexed = lexAsm(doc)
+            lexed = list(lexAsm(doc))
         except DiagnosticsException as ex:
             log.LogError(ex.Entry)
             continue
@@ -174,9 +134,10 @@ if sys.stdin.isatty():
         printDebug(instrs)
         printDebug(repr(instrs))
 
+        wholeLine = TokenSpan(lexed[0], lexed[-1]) if lexed else None
         for item in instrs:
             try:
-                processNode(asm, item, doc)
+                Assembler.processNode(asm, item, wholeLine)
             except DiagnosticsException as ex:
                 log.LogError(ex.Entry)
             
@@ -186,31 +147,38 @@ if sys.stdin.isatty():
                 print(repr(item.argumentList.toOperands(asm)))
 
         if repl:
-            printHex(asm.code[previousIndex:])
+            printHex(asm.listing(previousIndex))
             previousIndex = len(asm.code)
     print("")
 else:
-    for line in sys.stdin:
-        lineIndex += 1
-        doc = libdiagnostics.SourceDocument(line, "line " + str(lineIndex))
-        try:
-            lexed = lexAsm(doc)
-        except libdiagnostics.DiagnosticsException as ex:
-            log.LogError(ex.Entry)
-            continue
-        instrs = parseAllInstructions(TokenStream(lexed, doc, log))
-        for item in instrs:
-            try:
-                processNode(asm, item, doc)
-            except libdiagnostics.DiagnosticsException as ex:
-                log.LogError(ex.Entry)
+    # Read the whole input at once, and lex and parse it as a single document.
+    # Newlines terminate instructions.
+    if inputPath is None:
+        doc = libdiagnostics.SourceDocument(sys.stdin.read(), "stdin")
+    else:
+        with open(inputPath, "r") as f:
+            doc = libdiagnostics.SourceDocument(f.read(), inputPath)
+    # Parse the document line by line, reusing the syntax nodes of lines that
+    # have been seen before, unless the line cache is disabled.
+    lineCache = LineCache.LineCache(lineCacheSize) if lineCacheSize > 0 else None
+    if parallelThreads != 1:
+        asm = Parallel.assembleDocument(doc, log, lineCache, parallelThreads)
+    else:
+        instrs = Parallel.parseRange(doc, log, lineCache, 0, len(doc.Source))
+        Assembler.processLocatedInstructions(asm, instrs, log)
+    if lineCacheStats and lineCache is not None:
+        sys.stderr.write("%s\n" % lineCache)
 
 if jit:
+    # Branches must be relaxed before the buffer is allocated, as relaxation
+    # can change the size of the bytecode.
+    asm.relax()
     virtBuf = libjit.VirtualBuffer.Create(asm.index)
     asm.baseOffset = int(virtBuf.Pointer)
     asm.patchLabels()
+    reportPendingReferences(asm)
     virtBuf.Write(System.Array[System.Byte](asm.code))
-    func = libjit.JitFunction(virtBuf, getEntryPointOffset(asm))
+    func = libjit.JitFunction(virtBuf, Output.getEntryPointOffset(asm))
     if arg is None:
         print(func.Invoke[retType]())
     else:
@@ -218,21 +186,15 @@ if jit:
     func.Dispose()
 elif repl:
     asm.patchLabels()
-    printHex(asm.code)
+    printHex(asm.listing())
 elif output.endswith(".o"):
-    asm.baseOffset = 0
-    asm.relocateAbsolutes = False
-    asm.patchLabels()
-    coffFile = createObjectFile(asm, True)
-    libcoff.CoffWriter.WriteToFile(output, coffFile)
+    Output.prepareObjectFile(asm)
+    reportPendingReferences(asm)
+    Output.writeObjectFile(asm, output)
 elif output.endswith(".com"):
-    asm.baseOffset = 0x100
-    asm.patchLabels()
-    entryPoint = getEntryPoint(asm)
-    offset = getEntryPointOffset(asm)
-    if offset != 0:
-        # 0xe9 is a relative JMP instruction.
-        asm.code[:0] = [0xe9] + to32le(offset)
-    target = System.IO.FileStream(output, System.IO.FileMode.Create, System.IO.FileAccess.Write)
-    target.Write(System.Array[System.Byte](asm.code), 0, len(asm.code))
-    target.Dispose()
\ No newline at end of file
+    Output.prepareComFile(asm)
+    reportPendingReferences(asm)
+    Output.writeComFile(asm, output)
+
+if sizeReport:
+    reportSavedBytes(asm)
@@ -0,0 +1,12 @@
+  ; Instructions whose first operand is an immediate value. Each of these
+  ; is reported as an error, rather than assembled.
+  add 5, eax
+  cmp 1, 2
+  sub 1000, al
+  xchg 5, eax
+  xchg 5, 6
+
+  ; The same instructions, with valid operands, still assemble.
+  add eax, 5
+  cmp eax, 2
+  xchg eax, ebx
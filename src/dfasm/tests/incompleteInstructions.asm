@@ -0,0 +1,7 @@
+  ; Instructions that end before their last operand. The errors point at the
+  ; end of the line the instruction is on, with or without -line-cache:0.
+  mov eax, 1
+  add eax,   
+  nop
+  sub eax,
+  ret
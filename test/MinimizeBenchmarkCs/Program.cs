@@ -0,0 +1,127 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Linq;
+using System.Text;
+using Automata;
+
+namespace MinimizeBenchmarkCs
+{
+    /// <summary>
+    /// Compares the table-filling algorithm and Hopcroft's algorithm on
+    /// generated regexes whose DFAs have up to several thousands of states.
+    /// </summary>
+    public class Program
+    {
+        // The table-filling algorithm is far too slow beyond this many states:
+        // it already takes over a minute on the 39-state DFA of 10 keywords.
+        private const int MaxTfaStates = 64;
+
+        /// <summary>
+        /// Creates a regex for all strings over {a, b} whose n-th character
+        /// from the end is an 'a'. Its DFA has 2^n states.
+        /// </summary>
+        public static string NthFromEndRegex(int n)
+        {
+            var result = new StringBuilder("(a+b)*a");
+            for (int i = 1; i < n; i++)
+            {
+                result.Append("(a+b)");
+            }
+            return result.ToString();
+        }
+
+        /// <summary>
+        /// Creates a regex that is the union of the given number of random
+        /// keywords, like a set of instruction mnemonics.
+        /// </summary>
+        public static string KeywordRegex(int count, Random rand)
+        {
+            var keywords = new HashSet<string>();
+            while (keywords.Count < count)
+            {
+                var word = new StringBuilder();
+                int length = rand.Next(2, 8);
+                for (int i = 0; i < length; i++)
+                {
+                    word.Append((char)('a' + rand.Next(26)));
+                }
+                keywords.Add(word.ToString());
+            }
+            return string.Join("+", keywords);
+        }
+
+        public static double Time(Action action)
+        {
+            var watch = Stopwatch.StartNew();
+            action();
+            watch.Stop();
+            return watch.Elapsed.TotalMilliseconds;
+        }
+
+        public static int CountBlocks(Dictionary<int, StateSet<int>> Partition)
+        {
+            return new HashSet<StateSet<int>>(Partition.Values).Count;
+        }
+
+        /// <summary>
+        /// Checks if the given partitions are the same, i.e., if every state
+        /// is in the same block in both, so two states are equivalent under
+        /// one partition if and only if they are equivalent under the other.
+        /// </summary>
+        public static bool SamePartition(Dictionary<int, StateSet<int>> First, Dictionary<int, StateSet<int>> Second)
+        {
+            if (First.Count != Second.Count)
+            {
+                return false;
+            }
+            foreach (var item in First)
+            {
+                StateSet<int> block;
+                if (!Second.TryGetValue(item.Key, out block) || !item.Value.Equals(block))
+                {
+                    return false;
+                }
+            }
+            return true;
+        }
+
+        public static void Benchmark(string name, string regex)
+        {
+            var dfa = Automata.Interop.Instance.CompileRegex(regex).Automaton;
+            int stateCount = dfa.GetStates().Count;
+
+            Dictionary<int, StateSet<int>> hopcroft = null;
+            double hopcroftTime = Time(() => hopcroft = dfa.HopcroftPartition());
+
+            string tfaResult = "skipped";
+            if (stateCount <= MaxTfaStates)
+            {
+                Dictionary<int, StateSet<int>> tfa = null;
+                double tfaTime = Time(() => tfa = dfa.TFAPartition());
+                if (!SamePartition(tfa, hopcroft))
+                {
+                    throw new Exception("Partitions differ for '" + name + "'.");
+                }
+                tfaResult = tfaTime.ToString("F1") + " ms";
+            }
+
+            Console.WriteLine("{0,-16} {1,6} states -> {2,6} blocks; Hopcroft: {3,10:F1} ms; TFA: {4,10}",
+                              name, stateCount, CountBlocks(hopcroft), hopcroftTime, tfaResult);
+        }
+
+        public static void Main(string[] args)
+        {
+            for (int n = 2; n <= 12; n += 2)
+            {
+                Benchmark("nth-from-end " + n, NthFromEndRegex(n));
+            }
+
+            var rand = new Random(42);
+            foreach (int count in new int[] { 10, 50, 200, 800 })
+            {
+                Benchmark("keywords " + count, KeywordRegex(count, rand));
+            }
+        }
+    }
+}